@@ -0,0 +1,59 @@
+"""
+冷启动耗时：在全新的子进程中导入各页面模块、加载数据集，以及初始化 jieba 词典，
+对应一个新的 Streamlit 进程首次渲染页面前的准备工作。
+
+    python -m benchmarks.bench_startup --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# 每个用例在独立的解释器中执行，stdout 的最后一行是用例本身的耗时（秒）
+CASES = {
+    'import 数据概览': "import pages.overview",
+    'import 数据查询': "import pages.data_query",
+    'import TV面板价格': "import tv_panel_price",
+    '加载数据集': "from utils.dataset_registry import registry; registry.current()",
+    'jieba 无缓存': "from utils import tokenizer; tokenizer.JIEBA_CACHE = tokenizer.Path({tmp!r}) / 'jieba.pkl'; "
+                   "tokenizer.load_jieba()",
+    'jieba 磁盘缓存': "from utils.tokenizer import load_jieba; load_jieba()",
+}
+
+TEMPLATE = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def run_case(code, repeat):
+    seconds = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            script = TEMPLATE.format(code=code.format(tmp=tmp))
+            result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                    check=True, env={**os.environ, 'PYTHONPATH': os.getcwd()})
+        seconds.append(float(result.stdout.strip().splitlines()[-1]))
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # 先生成一次磁盘缓存，保证“磁盘缓存”用例命中
+    run_case(CASES['jieba 磁盘缓存'], 1)
+    print(f"{'用例':<16} {'最短':>8} {'中位数':>8}")
+    for name in args.cases:
+        seconds = run_case(CASES[name], args.repeat)
+        print(f"{name:<16} {min(seconds):>7.3f}s {statistics.median(seconds):>7.3f}s", flush=True)
+
+
+if __name__ == "__main__":
+    main()
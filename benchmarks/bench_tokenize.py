@@ -0,0 +1,41 @@
+"""
+核心卖点分词吞吐量对比：原有的整串单进程分词 vs utils.tokenizer 的逐行进程池分词。
+
+    python -m benchmarks.bench_tokenize --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import make_texts
+from utils.tokenizer import STOP_WORDS, load_jieba, preprocess_text, tokenize_texts
+
+
+def baseline_tokenize(texts):
+    """原 pages.overview.process_words 的做法：拼成一个大字符串后单进程分词"""
+    text = ' '.join(preprocess_text(t) for t in texts)
+    return [word for word in load_jieba().cut(text) if word not in STOP_WORDS and len(word) > 1]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    load_jieba()
+    print(f"{'行数':>10} {'原方案(行/秒)':>14} {'进程池(行/秒)':>14} {'加速比':>8}")
+    for rows in args.rows:
+        texts = make_texts(rows)
+        baseline = timed(baseline_tokenize, texts)
+        parallel = timed(tokenize_texts, texts, workers=args.workers)
+        print(f"{rows:>10} {rows / baseline:>14,.0f} {rows / parallel:>14,.0f} {baseline / parallel:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
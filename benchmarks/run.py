@@ -0,0 +1,216 @@
+"""
+看板热点路径的基准测试：用合成数据在不启动 Streamlit 的情况下调用各页面的计算函数，
+记录耗时和 Python 堆内存峰值，结果可写成 JSON 与之前的结果对比。
+
+    python -m benchmarks.run --rows 10000 100000 1000000 --output bench.json
+    python -m benchmarks.run --rows 100000 --cases top5 query --compare bench.json
+
+词云用例的分词在子进程中进行，内存峰值只统计主进程。
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_listings
+from utils.aggregates import aggregate_frame, daily_metrics
+from utils.alerts import detect_alerts, empty_state
+from utils.data_store import read_frame, write_frame
+from utils.ingest import row_keys
+from utils.pagination import paginate
+from utils.products import ProductIndex, build_products
+from utils.query_engine import FilterIndex, LazyView
+from utils.search_index import build_search_index
+from utils.timeseries import trend_series
+from utils.wordcloud_cache import build_word_frequencies
+
+# 对比时耗时超过基准的该倍数视为性能回退
+REGRESSION_RATIO = 1.2
+
+
+def bench_load(df, workdir):
+    """数据加载：读取一个历史分片（load_data / registry.refresh 的主要开销）"""
+    path = workdir / 'history.parquet'
+    if not path.exists():
+        write_frame(df, path)
+    return lambda: read_frame(path)
+
+
+def bench_dedup(df, workdir):
+    """增量入库：对新快照计算去重键"""
+    return lambda: np.unique(row_keys(df))
+
+
+def bench_aggregates(df, workdir):
+    """侧边栏指标：聚合新增行并计算每日指标"""
+    return lambda: daily_metrics(aggregate_frame(df))
+
+
+def bench_top5(df, workdir):
+    """价格变化 TOP5：由商品索引计算价格变化并对四个厂商各取第一页（商品索引的构建见 products 用例）"""
+    index = ProductIndex(build_products(df))
+
+    def run():
+        changes = index.price_changes()
+        for manufacturer in ['小米', '创维', '海信', 'TCL']:
+            view = LazyView(changes, np.flatnonzero((changes['厂商'] == manufacturer).to_numpy()))
+            paginate(view, 0, 5, sort_key='价格变化', ascending=False, key=np.abs)
+    return run
+
+
+def bench_products(df, workdir):
+    """商品表：建立商品/链接编号和连续的价格历史，并由索引计算价格变化"""
+    return lambda: ProductIndex(build_products(df)).price_changes()
+
+
+def bench_query(df, workdir):
+    """数据查询页：建立筛选索引，按厂商/尺寸/价格筛选并取第一页"""
+    def run():
+        filter_index = FilterIndex(df)
+        view = filter_index.select({'厂商': ['小米'], '尺寸': ['65寸']}, price_range=(2000, 8000))
+        paginate(view, 0, 50, sort_key='清洗价格')
+    return run
+
+
+def bench_search(df, workdir):
+    """标题搜索：建立倒排索引并查询"""
+    def run():
+        build_search_index(df).search('小米 65英寸')
+    return run
+
+
+def bench_trends(df, workdir):
+    """价格趋势：五个机型按天重采样并降采样"""
+    models = df['机型'].cat.categories[:5]
+    frame = df[df['机型'].isin(models)]
+    return lambda: trend_series(frame, '清洗价格', '天')
+
+
+def bench_alerts(df, workdir):
+    """价格告警：把整个数据集当作一次新增行检测"""
+    return lambda: detect_alerts(df, empty_state())
+
+
+def bench_wordcloud(df, workdir):
+    """词云：按厂商、日期统计核心卖点词频"""
+    return lambda: build_word_frequencies(df)
+
+
+CASES = {
+    'load': bench_load,
+    'dedup': bench_dedup,
+    'aggregates': bench_aggregates,
+    'top5': bench_top5,
+    'products': bench_products,
+    'query': bench_query,
+    'search': bench_search,
+    'trends': bench_trends,
+    'alerts': bench_alerts,
+    'wordcloud': bench_wordcloud,
+}
+
+
+def measure(run, repeat):
+    """先重复计时（不开启 tracemalloc），再单独跑一次记录内存峰值"""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_suite(rows_list, cases, repeat=3, days=14):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            df = make_listings(rows, days=days)
+            workdir = Path(tmp) / str(rows)
+            workdir.mkdir()
+            for name in cases:
+                seconds, peak = measure(CASES[name](df, workdir), repeat)
+                best = min(seconds)
+                result = {
+                    'case': name,
+                    'rows': rows,
+                    'seconds': best,
+                    'seconds_median': statistics.median(seconds),
+                    'rows_per_second': rows / best if best else None,
+                    'peak_mb': peak / 1024 / 1024,
+                }
+                results.append(result)
+                print(f"{name:>10} {rows:>10} {best:>10.3f}s {result['peak_mb']:>10.1f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline_path, threshold=REGRESSION_RATIO):
+    """与之前的 JSON 结果对比，返回耗时超过阈值的用例"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    previous = {(r['case'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'用例':>10} {'行数':>10} {'基准':>10} {'本次':>10} {'比值':>8}")
+    for result in results:
+        old = previous.get((result['case'], result['rows']))
+        if old is None:
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        flag = ' ←' if ratio > threshold else ''
+        print(f"{result['case']:>10} {result['rows']:>10} {old['seconds']:>9.3f}s "
+              f"{result['seconds']:>9.3f}s {ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--days', type=int, default=14, help='合成数据覆盖的爬取天数')
+    parser.add_argument('--output', help='结果写入的 JSON 文件')
+    parser.add_argument('--compare', help='作为基准的 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args()
+
+    print(f"{'用例':>10} {'行数':>10} {'耗时':>11} {'内存峰值':>11}")
+    results = run_suite(args.rows, args.cases, repeat=args.repeat, days=args.days)
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'repeat': args.repeat,
+                'days': args.days,
+            },
+            'results': results,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 个用例耗时超过基准的 {args.threshold:.1f} 倍")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+生成与 data/20250304-0317已清洗new.xlsx 入库后结构一致的京东电视商品数据：
+厂商, 机型, 店铺, 尺寸, 清洗价格, 评论数, 核心卖点, 标题, 爬取时间（以及派生的 价格, 尺寸数值）。
+
+每个 (机型, 店铺) 商品每天被爬取一次，价格围绕基准价随机波动并偶有降价，
+列类型与 utils.ingest.load_history 的输出一致，可直接喂给各页面的计算函数。
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+MANUFACTURERS = ['小米', '海信', '创维', 'TCL', '其他品牌']
+# 与样例数据中各厂商的记录数占比相近
+MANUFACTURER_WEIGHTS = [0.28, 0.21, 0.20, 0.19, 0.12]
+MODEL_PREFIXES = {'小米': 'L', '海信': 'E', '创维': 'A', 'TCL': 'T', '其他品牌': 'X'}
+SIZES = [32, 43, 50, 55, 65, 75, 85, 98, 100]
+SIZE_WEIGHTS = [0.08, 0.10, 0.10, 0.15, 0.22, 0.18, 0.10, 0.05, 0.02]
+STORE_SUFFIXES = ['京东自营旗舰店', '官方旗舰店', '专卖店', '电视旗舰店', '家电专营店']
+
+SELLING_POINTS = [
+    '能效:一级', '显示:4K', '显示:2200nits', '显示:896分区', '屏幕:Mini LED', '屏幕:防蓝光',
+    '屏幕:护眼', '屏幕:超薄', '屏幕:全面屏', '1核+8GB', '4GB+64GB', '144Hz高刷', '智能:语音控制',
+    '分辨率:超高清', '功能:远场语音', '参数:120Hz', '特点:量子点', '杜比视界', '澎湃OS',
+]
+
+
+def make_texts(rows, seed=42):
+    """随机组合的核心卖点文本"""
+    rng = random.Random(seed)
+    return [' | '.join(rng.sample(SELLING_POINTS, rng.randint(2, 6))) for _ in range(rows)]
+
+
+def make_listings(rows, days=14, start='2025-03-04', seed=42):
+    """
+    生成 rows 行商品数据。商品数为 rows / days，每个商品每天一行；
+    文本列只为每个商品生成一次，各行共享同一个字符串对象，千万行时内存也可控。
+    """
+    rng = np.random.default_rng(seed)
+    days = max(1, min(days, rows))
+    listings = max(1, rows // days)
+
+    # 商品维度：每个机型平均在两家店铺销售
+    model_id = np.arange(listings) // 2
+    models_count = model_id[-1] + 1
+    manufacturer = rng.choice(len(MANUFACTURERS), size=models_count, p=MANUFACTURER_WEIGHTS)[model_id]
+    size = np.asarray(SIZES)[rng.choice(len(SIZES), size=models_count, p=SIZE_WEIGHTS)][model_id]
+    store_id = rng.integers(0, max(1, min(2000, listings // 4)), size=listings)
+    base_price = (size * rng.uniform(30, 120, size=listings)).round(-1) - 1
+    comments = rng.lognormal(7, 2, size=listings).clip(0, 2_000_000).astype('int32')
+
+    manufacturer_names = np.asarray(MANUFACTURERS, dtype=object)[manufacturer]
+    models = np.asarray([f"{MODEL_PREFIXES[m]}{s}{i:05d}" for m, s, i in
+                         zip(manufacturer_names, size, model_id)], dtype=object)
+    stores = np.asarray([f"{m}{STORE_SUFFIXES[i % len(STORE_SUFFIXES)]}{i}" for m, i in
+                         zip(manufacturer_names, store_id)], dtype=object)
+    selling_points = np.asarray(make_texts(listings, seed), dtype=object)
+    titles = np.asarray([f"{m} {model} {s}英寸 {points.replace(' | ', ' ')}" for m, model, s, points in
+                         zip(manufacturer_names, models, size, selling_points)], dtype=object)
+
+    # 行：第 i 行是第 i % listings 个商品在第 i // listings 天的记录
+    listing = np.arange(rows) % listings
+    day = np.arange(rows) // listings
+    crawl_time = (pd.Timestamp(start) + pd.to_timedelta(day, unit='D')
+                  + pd.to_timedelta(rng.integers(9 * 3600, 21 * 3600, size=rows), unit='s'))
+    # 每天 ±3% 波动，约 5% 的记录降价 10%~30%
+    noise = rng.normal(0, 0.03, size=rows)
+    drops = np.where(rng.random(rows) < 0.05, rng.uniform(0.1, 0.3, size=rows), 0)
+    price = (base_price[listing] * (1 + noise - drops)).round().astype('float32')
+    comment_count = (comments[listing] * (1 + day * 0.01)).astype('int32')
+
+    def categorical(values):
+        # 只对商品级的取值编码，再按行展开编号
+        codes, categories = pd.factorize(values, sort=True)
+        return pd.Categorical.from_codes(codes[listing], categories=categories)
+
+    df = pd.DataFrame({
+        '标题': pd.array(titles[listing], dtype='string'),
+        '价格': price,
+        '店铺': categorical(stores),
+        '爬取时间': crawl_time,
+        '厂商': categorical(manufacturer_names),
+        '机型': categorical(models),
+        '尺寸': categorical(np.asarray([f"{s}寸" for s in size], dtype=object)),
+        '核心卖点': pd.array(selling_points[listing], dtype='string'),
+        '评论数': comment_count,
+        '清洗价格': price,
+        '尺寸数值': size[listing].astype('float32'),
+    })
+    return df
+
+
+if __name__ == "__main__":
+    # 查看生成的数据：python -m benchmarks.synthetic 20
+    import sys
+
+    sample = make_listings(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
+    print(sample.to_string())
+    print(sample.dtypes.to_string())
@@ -1,8 +1,12 @@
+import time
+
+# 脚本开始执行的时间，用于记录进程内首次渲染（含模块导入、数据加载）的耗时
+script_started = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-from pathlib import Path
-from pages.overview import show_overview
-from pages.data_query import show_data_query
+from utils.profile_panel import profile_toggle, show_profile_panel
+from utils import profiling, refresh_worker
+from utils.dataset_registry import registry
 
 
 # 设置页面配置
@@ -19,28 +23,55 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# 读取数据函数
-@st.cache_data
-def load_data():
-    file_path = Path("data/20250304-0317已清洗new.xlsx")
-    df = pd.read_excel(file_path)
-    df['爬取时间'] = pd.to_datetime(df['爬取时间'])
-    return df
+def show_data_status(dataset):
+    """侧边栏展示当前数据版本和后台刷新状态；本会话使用的数据版本变化时提示一次"""
+    if st.session_state.get('data_version') not in (None, dataset.version):
+        st.toast(f"数据已更新（版本 {dataset.version}）")
+    st.session_state['data_version'] = dataset.version
+
+    worker = refresh_worker.worker()
+    status = f"数据版本 {dataset.version}"
+    if worker is not None:
+        if worker.refreshing:
+            status += "，正在后台入库新数据"
+        elif worker.last_check is not None:
+            status += f"，{time.strftime('%H:%M:%S', time.localtime(worker.last_check))} 检查过更新"
+    st.sidebar.caption(status)
+    if worker is not None and worker.last_error:
+        st.sidebar.warning(f"后台刷新失败：{worker.last_error}")
+
 
 def main():
-    df = load_data()
-    
     # 侧边栏导航 - 直接显示选择框
     page = st.sidebar.selectbox(
         "选择页面",
         ["数据概览", "数据查询"]
     )
-    
-    # 页面路由
-    if page == "数据概览":
-        show_overview(df)
-    elif page == "数据查询":
-        show_data_query(df)
+
+    # 开启性能分析时记录本次重跑各区块的耗时，页面底部展示并写入日志
+    profile = profiling.start(page) if profile_toggle() else None
+    try:
+        with profiling.current().section("加载数据"):
+            # 数据集在进程内所有会话间共享，只有数据版本变化时才重新加载；
+            # 新快照由后台线程入库并切换版本，本次重跑始终使用这里取得的数据集
+            dataset = registry.current()
+            refresh_worker.start()
+        profiling.current().record_frame("明细数据", dataset.df)
+        show_data_status(dataset)
+
+        # 页面路由：页面模块在首次打开时才导入，只看数据查询时不加载 plotly 等绘图库
+        if page == "数据概览":
+            from pages.overview import show_overview
+            show_overview(dataset)
+        elif page == "数据查询":
+            from pages.data_query import show_data_query
+            show_data_query(dataset)
+    finally:
+        if profile is not None:
+            profiling.stop()
+    profiling.record_startup(page, time.perf_counter() - script_started)
+    if profile is not None:
+        show_profile_panel(profile)
 
 
 if __name__ == "__main__":
@@ -1,47 +1,87 @@
+import tempfile
+from pathlib import Path
+
 import streamlit as st
+from utils import profiling
+from utils.pagination import page_count, paginate, write_csv, write_parquet
+from utils.query_api import select_listings
+from utils.query_engine import FilterIndex
+
 
-def show_data_query(df):
+def show_data_query(dataset):
     st.title("数据查询")
+    df = dataset.df
+    profile = profiling.current()
+    # 筛选索引按数据版本构建一次，数据概览页的厂商/机型选择也共用
+    with profile.section("筛选索引"):
+        filter_index = dataset.derived('filter_index', FilterIndex)
     
     # 查询条件
-    col1, col2, col3 = st.columns(3)
+    with profile.section("查询条件"):
+        col1, col2, col3 = st.columns(3)
     
-    with col1:
-        brand_filter = st.multiselect(
-            "选择品牌",
-            options=sorted(df['厂商'].unique())
-        )
+        with col1:
+            brand_filter = st.multiselect(
+                "选择品牌",
+                options=filter_index.options('厂商')
+            )
     
-    with col2:
-        price_range = st.slider(
-            "价格范围",
-            float(df['清洗价格'].min()),
-            float(df['清洗价格'].max()),
-            (float(df['清洗价格'].min()), float(df['清洗价格'].max()))
-        )
+        with col2:
+            price_range = st.slider(
+                "价格范围",
+                float(df['清洗价格'].min()),
+                float(df['清洗价格'].max()),
+                (float(df['清洗价格'].min()), float(df['清洗价格'].max()))
+            )
     
-    with col3:
-        size_filter = st.multiselect(
-            "选择尺寸",
-            options=sorted(df['尺寸'].unique())
-        )
+        with col3:
+            size_filter = st.multiselect(
+                "选择尺寸",
+                options=filter_index.options('尺寸')
+            )
     
-    # 标题搜索
-    search_term = st.text_input("搜索商品标题")
+    with profile.section("筛选"):
+        # 标题搜索，多个关键词用空格分隔（需同时包含）
+        search_term = st.text_input("搜索商品标题")
     
-    # 应用筛选
-    query_df = df.copy()
-    if brand_filter:
-        query_df = query_df[query_df['厂商'].isin(brand_filter)]
-    query_df = query_df[
-        (query_df['清洗价格'] >= price_range[0]) & 
-        (query_df['清洗价格'] <= price_range[1])
-    ]
-    if size_filter:
-        query_df = query_df[query_df['尺寸'].isin(size_filter)]
-    if search_term:
-        query_df = query_df[query_df['标题'].str.contains(search_term, case=False)]
+        # 应用筛选：各条件在索引上得到行号集合后求交集，最后只取一次结果（与查询接口共用）
+        view = select_listings(dataset, {'厂商': brand_filter, '尺寸': size_filter},
+                               price_range=price_range, search=search_term)
     
-    # 显示结果
-    st.write(f"找到 {len(query_df)} 条记录")
-    st.dataframe(query_df) 
\ No newline at end of file
+    with profile.section("分页"):
+        # 显示结果：只取出当前页的数据发送到浏览器
+        st.write(f"找到 {len(view)} 条记录")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_key = st.selectbox("排序字段", ['默认', '清洗价格', '评论数', '爬取时间'])
+        with col2:
+            ascending = st.radio("排序方式", ['升序', '降序'], horizontal=True) == '升序'
+        with col3:
+            page_size = st.selectbox("每页条数", [20, 50, 100, 200], index=1)
+
+        total_pages = page_count(len(view), page_size)
+        # 结果数变化时页码控件重置到第一页
+        page_number = st.number_input(f"选择页码 (1-{total_pages})", min_value=1, max_value=total_pages, step=1,
+                                      key=f"query_page_{total_pages}") - 1
+        page_df, _ = paginate(view, page_number, page_size,
+                              sort_key=None if sort_key == '默认' else sort_key, ascending=ascending)
+        profile.record_frame('当前页', page_df)
+        st.dataframe(page_df)
+
+    with profile.section("导出"):
+        # 导出全部结果：分块转换写入临时文件，不会先拼出完整的结果 DataFrame。
+        # 但 st.download_button 会把整个文件读入 Streamlit 的媒体存储，文件本身仍要全部放在内存里，
+        # 很大的结果应通过查询服务（utils.query_server）的流式接口导出
+        with st.expander("导出全部结果"):
+            st.caption("导出文件需要整体加载到内存；结果很大时请使用查询服务 "
+                       "`python -m utils.query_server` 的 POST /query?format=parquet 流式导出")
+            export_format = st.radio("导出格式", ['CSV', 'Parquet'], horizontal=True)
+            if st.button("生成导出文件"):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    path = Path(tmp_dir) / f"查询结果.{export_format.lower()}"
+                    if export_format == 'CSV':
+                        write_csv(view, path)
+                    else:
+                        write_parquet(view, path)
+                    with open(path, 'rb') as f:
+                        st.download_button("下载", f, file_name=path.name) 
\ No newline at end of file
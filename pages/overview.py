@@ -1,59 +1,81 @@
 import streamlit as st
 import plotly.express as px
-import jieba
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import io
-import pandas as pd
 import numpy as np
-from PIL import Image
-import random
-
-def show_overview(df):
-    st.title('京东电视商品数据分析平台')
-
-    # 在标题下方添加数据范围和更新日期说明
-    st.markdown("""
-    <div style='font-size: 0.9rem; color: gray;'>
-        数据范围：全国 | 最新更新日期：{update_date}
-    </div>
-    """.format(update_date=df['爬取时间'].max().strftime('%Y-%m-%d %H:%M')), unsafe_allow_html=True)
-
-    # 在侧边栏添加刷新数据按钮
-    if st.sidebar.button("刷新数据"):
-        st.experimental_rerun()  # 重新加载页面
-
-    # 计算前一天的数据
-    latest_date = df['爬取时间'].max()
-    previous_date = latest_date - pd.Timedelta(days=1)
-    df_previous = df[df['爬取时间'] == previous_date]
+from utils.profile_panel import profiled_fragment
+from utils.aggregates import daily_metrics, price_bucket_counts, size_counts
+from utils import profiling, refresh_worker
+from utils.alerts import ALERT_TYPES
+from utils.dataset_registry import registry
+from utils.pagination import page_count, paginate
+from utils.price_changes import select_price_changes
+from utils.products import dataset_price_changes, product_index
+from utils.query_engine import FilterIndex
+from utils.timeseries import GRANULARITIES, trend_series
+from utils.wordcloud_cache import wordcloud_images
+
+# 词云和价格变化表格展示的厂商
+MANUFACTURERS = ['小米', '创维', '海信', 'TCL']
+
+
+@st.cache_data(max_entries=64)
+def load_trends(_dataset, data_version, manufacturer, models, granularity, start_day, end_day):
+    """
+    按 (机型集合, 时间范围, 粒度) 缓存价格和评论数的趋势数据。
+    返回 (价格趋势, 评论数趋势)，数据中没有评论数列时评论数趋势为 None。
+    """
+    profiling.current().cache_miss('load_trends')
+    filter_index = _dataset.derived('filter_index', FilterIndex)
+    view = filter_index.select({
+        '厂商': [] if manufacturer == '全部' else [manufacturer],
+        '机型': list(models),
+    })
+    columns = [c for c in ['爬取时间', '机型', '清洗价格', '评论数'] if c in _dataset.df.columns]
+    frame = view.to_frame(columns)
+    price_df = trend_series(frame, '清洗价格', granularity, start=start_day, end=end_day)
+    comment_df = None
+    if '评论数' in frame.columns:
+        comment_df = trend_series(frame, '评论数', granularity, start=start_day, end=end_day)
+    return price_df, comment_df
+
+
+def manufacturer_models(dataset, manufacturer):
+    """某厂商的机型（已排序），按数据版本缓存，切换厂商时不再扫描明细"""
+    models = dataset.derived('manufacturer_models', lambda df: {
+        str(name): sorted(values.dropna())
+        for name, values in df.groupby('厂商', observed=True)['机型'].unique().items()
+    })
+    return models.get(manufacturer, [])
+
+
+def crawl_date_range(dataset):
+    return dataset.derived('crawl_date_range', lambda df: (df['爬取时间'].min().date(), df['爬取时间'].max().date()))
+
+
+def show_sidebar_metrics(dataset):
+    # 侧边栏指标来自入库时增量维护的按天汇总表，与明细行数无关
+    metrics = dataset.derived('daily_metrics', lambda df: daily_metrics(dataset.tables['aggregates']))
+    # 最新一个爬取日与其前一个有数据的爬取日对比
+    current = metrics.iloc[-1] if len(metrics) else None
+    previous = metrics.iloc[-2] if len(metrics) > 1 else current
 
     # 在侧边栏显示数据概要
     st.sidebar.header("数据概要")
-    current_total_products = len(df.sort_values('爬取时间').drop_duplicates(subset=['机型'], keep='last'))
-    previous_total_products = len(df_previous.sort_values('爬取时间').drop_duplicates(subset=['机型'], keep='last'))
-    st.sidebar.metric("商品总数", f"{current_total_products:,}",
-                      delta=f"{current_total_products - previous_total_products} 商品")
-
-    current_avg_price = df['清洗价格'].mean()
-    previous_avg_price = df_previous['清洗价格'].mean()
-    st.sidebar.metric("平均价格", f"¥{current_avg_price:,.0f}",
-                      delta=f"环比 {current_avg_price - previous_avg_price:,.0f}")
-
-    current_median_price = df['清洗价格'].median()
-    previous_median_price = df_previous['清洗价格'].median()
-    st.sidebar.metric("中位数", f"¥{current_median_price:,.0f}",
-                      delta=f"环比 {current_median_price - previous_median_price:,.0f}")
-
-    current_max_price = df['清洗价格'].max()
-    previous_max_price = df_previous['清洗价格'].max()
-    st.sidebar.metric("最高价格", f"¥{current_max_price:,.0f}",
-                      delta=f"环比 {current_max_price - previous_max_price:,.0f}")
-
-    current_min_price = df['清洗价格'].min()
-    previous_min_price = df_previous['清洗价格'].min()
-    st.sidebar.metric("最低价格", f"¥{current_min_price:,.0f}",
-                      delta=f"环比 {current_min_price - previous_min_price:,.0f}")
+    if current is not None:
+        st.sidebar.metric("商品总数", f"{int(current['商品数']):,}",
+                          delta=f"{int(current['商品数'] - previous['商品数'])} 商品")
+        st.sidebar.metric("平均价格", f"¥{current['平均价格']:,.0f}",
+                          delta=f"环比 {current['平均价格'] - previous['平均价格']:,.0f}")
+        st.sidebar.metric("中位数", f"¥{current['中位数']:,.0f}",
+                          delta=f"环比 {current['中位数'] - previous['中位数']:,.0f}")
+        st.sidebar.metric("最高价格", f"¥{current['最高价格']:,.0f}",
+                          delta=f"环比 {current['最高价格'] - previous['最高价格']:,.0f}")
+        st.sidebar.metric("最低价格", f"¥{current['最低价格']:,.0f}",
+                          delta=f"环比 {current['最低价格'] - previous['最低价格']:,.0f}")
+        st.sidebar.caption(f"统计日期：{current.name:%Y-%m-%d}，对比 {previous.name:%Y-%m-%d}")
+    # 累计商品数来自入库时建立的商品表，不扫描明细
+    products = product_index(dataset)
+    st.sidebar.caption(f"累计 {products.product_count():,} 个商品（厂商+机型+尺寸，不含通用型号），"
+                       f"{products.listing_count():,} 条店铺链接")
 
     # 添加浏览数据
     st.sidebar.header("浏览数据")
@@ -68,228 +90,205 @@ def show_overview(df):
     st.sidebar.metric("访问人数", f"{current_users:,}",
                       delta=f"环比 {current_users - previous_users:,}")
 
+
+@profiled_fragment("词云")
+def show_wordclouds(dataset):
     # 核心卖点词云分析
     st.subheader("核心卖点词云分析")
 
-    # 处理文本
-    def preprocess_text(text):
-        remove_words = ['屏幕', '智能', '能效', '显示', '分辨率', '尺寸', '功能', '特点', '参数']
-        for word in remove_words:
-            text = text.replace(f"{word}：", "")
-            text = text.replace(f"{word}:", "")  # 处理英文冒号的情况
-        return text
-
-    text = ' '.join(df['核心卖点'].dropna().apply(preprocess_text))
-
-    # 分词并去除停用词
-    def process_words(text):
-        stop_words = set(['的', '了', '和', '与', '及', '或', '等', '中', '为', '以'])
-        words = jieba.cut(text)
-        return ' '.join([word for word in words if word not in stop_words and len(word) > 1])
-
-    # 处理文本
-    words = process_words(text)
-
-    # 莫兰迪色系颜色函数
-    def morandi_color_func(word, font_size, position, orientation, random_state=None, **kwargs):
-        morandi_colors = [
-            (199, 178, 153),  # 浅棕色
-            (183, 164, 142),  # 灰棕色
-            (168, 153, 134),  # 灰褐色
-            (153, 138, 122),  # 深灰褐色
-            (138, 123, 110)   # 深褐色
-        ]
-        color = random.choice(morandi_colors)
-        return f"rgb{color}"
-
-    # 生成词云
-    def generate_wordcloud(text):
-        wordcloud = WordCloud(
-            width=400,
-            height=200,
-            background_color='white',
-            font_path='simhei.ttf',
-            max_words=100,
-            color_func=morandi_color_func,  # 使用莫兰迪色系颜色函数
-            collocations=False,
-            min_font_size=12,
-            max_font_size=160,
-            prefer_horizontal=0.7,  # 允许更多垂直文字
-            random_state=42  # 设置随机种子以确保可重复性
-        ).generate(text)
-
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0)
-        buf.seek(0)
-        plt.close()
-        return buf
-
-    # 为每个厂商生成词云
+    # 首次生成需要对全部核心卖点分词，未生成过时默认不加载，打开开关后才生成
+    st.session_state.setdefault('show_wordclouds', dataset.has_derived('wordcloud_images'))
+    if not st.toggle("显示词云", key='show_wordclouds'):
+        st.caption("词云需要对核心卖点分词，首次生成较慢，打开开关后加载")
+        return
+
+    # 词频和词云图片按数据版本预先生成并缓存，重跑时不再分词和渲染
+    images = dataset.derived('wordcloud_images',
+                             lambda df: wordcloud_images(df, dataset.version, MANUFACTURERS))
     cols = st.columns(4)
-    for i, manufacturer in enumerate(['小米', '创维', '海信', 'TCL']):
-        manufacturer_df = df[df['厂商'] == manufacturer]
-        text = ' '.join(manufacturer_df['核心卖点'].dropna().apply(preprocess_text))
-        words = process_words(text)
-        if words:  # 确保处理后的文本非空
-            wordcloud_image = generate_wordcloud(words)
-            cols[i].image(wordcloud_image, caption=manufacturer)
+    for i, manufacturer in enumerate(MANUFACTURERS):
+        if images[manufacturer]:
+            cols[i].image(images[manufacturer], caption=manufacturer)
         else:
             cols[i].warning(f"{manufacturer} 的处理后的文本为空，无法生成词云")
 
-    # 价格监控告警区域
-    st.header("📊价格变化最大的商品TOP5")
-    st.markdown("<div style='font-size: 0.9rem; color: gray;'>价格变化逻辑：计算每个商品的最新价格与前一次价格的差异。</div>", unsafe_allow_html=True)
-
-    # 价格变化表格（新增在数据大屏部分）
-    # 指定四个厂商
-    selected_manufacturers = ['小米', '创维', '海信', 'TCL']
-
-    # 创建上下布局，每行两个厂商
-    top_col1, top_col2 = st.columns(2)
-    bottom_col1, bottom_col2 = st.columns(2)
-
-    # 格式化价格变化列并添加颜色样式
-    def format_price_change(price_change):
-        if price_change >= 0:
-            return f"<span style='color: green;'>↑ {price_change:.2f}</span>"
-        else:
-            return f"<span style='color: red;'>↓ {price_change:.2f}</span>"
-
-    for i, manufacturer in enumerate(selected_manufacturers):
-        # 筛选对应厂商的数据
-        manufacturer_df = df[df['厂商'] == manufacturer]
-        manufacturer_df = manufacturer_df[manufacturer_df['机型'] != '通用型号']  # 过滤通用型号
-
-        def calculate_price_change(group):
-            sorted_group = group.sort_values('爬取时间')
-            if len(sorted_group) < 2:
-                return 0
-            latest_price = sorted_group['清洗价格'].iloc[-1]
-            previous_price = sorted_group['清洗价格'].iloc[-2]
-            return latest_price - previous_price
-
-        # 计算价格变化最大的商品
-        price_changes = manufacturer_df.groupby(['机型', '店铺', '尺寸']).apply(calculate_price_change).reset_index().rename(columns={0: '价格变化'})
-        latest_prices = manufacturer_df.groupby(['机型', '店铺', '尺寸']).agg(
-            最新价格=('清洗价格', 'last'),
-            变化日期=('爬取时间', 'max')
-        ).reset_index()
-        price_changes = price_changes.merge(latest_prices, on=['机型', '店铺', '尺寸'])
-        # 格式化日期列
-        price_changes['变化日期'] = price_changes['变化日期'].dt.strftime('%Y-%m-%d')
-        price_changes = price_changes.sort_values('价格变化', key=lambda x: x.abs(), ascending=False)
-
-        # 添加搜索和筛选功能
-        with st.expander(f"{manufacturer} 价格变化表格"):
-            search_model = st.text_input(f"搜索{manufacturer}的机型")
-            selected_store = st.multiselect(f"选择{manufacturer}的店铺", options=price_changes['店铺'].unique())
-            selected_size = st.multiselect(f"选择{manufacturer}的尺寸", options=price_changes['尺寸'].unique())
-
-            # 应用搜索和筛选
-            if search_model:
-                price_changes = price_changes[price_changes['机型'].str.contains(search_model)]
-            if selected_store:
-                price_changes = price_changes[price_changes['店铺'].isin(selected_store)]
-            if selected_size:
-                price_changes = price_changes[price_changes['尺寸'].isin(selected_size)]
-
-            # 分页
-            page_size = 5
-            total_pages = (len(price_changes) + page_size - 1) // page_size
-            page_number = st.number_input(f"选择页码 (1-{total_pages})", min_value=1, max_value=total_pages, step=1) - 1
-
-            # 显示当前页的数据
-            start_idx = page_number * page_size
-            end_idx = start_idx + page_size
-            current_page_data = price_changes.iloc[start_idx:end_idx]
-
-            # 美化表格
-            html_table = current_page_data.to_html(
-                escape=False,
-                index=False,
-                header=True,
-                formatters={'价格变化': format_price_change}
-            )
-            st.write(html_table, unsafe_allow_html=True)
 
+# 格式化价格变化列并添加颜色样式
+def format_price_change(price_change):
+    if price_change >= 0:
+        return f"<span style='color: green;'>↑ {price_change:.2f}</span>"
+    else:
+        return f"<span style='color: red;'>↓ {price_change:.2f}</span>"
+
+
+@profiled_fragment("价格变化表格")
+def show_price_change_table(dataset, manufacturer):
+    """单个厂商的价格变化表格；搜索、筛选和翻页只重跑这一张表"""
+    # 所有厂商的价格变化一次算好，各厂商表格只做切片
+    all_price_changes = dataset_price_changes(dataset)
+    manufacturer_view = select_price_changes(all_price_changes, manufacturer)
+
+    # 添加搜索和筛选功能
+    with st.expander(f"{manufacturer} 价格变化表格"):
+        search_model = st.text_input(f"搜索{manufacturer}的机型")
+        selected_store = st.multiselect(f"选择{manufacturer}的店铺", options=manufacturer_view.unique('店铺'))
+        selected_size = st.multiselect(f"选择{manufacturer}的尺寸", options=manufacturer_view.unique('尺寸'))
+
+        # 应用搜索和筛选：只计算命中的行号，不复制表格
+        view = select_price_changes(all_price_changes, manufacturer, search_model, selected_store, selected_size)
+
+        # 分页：按价格变化绝对值降序，只对当前页之前的行做部分排序
+        page_size = 5
+        total_pages = page_count(len(view), page_size)
+        page_number = st.number_input(f"选择页码 (1-{total_pages})", min_value=1, max_value=total_pages, step=1,
+                                      key=f"price_change_page_{manufacturer}_{total_pages}") - 1
+
+        # 显示当前页的数据
+        current_page_data, _ = paginate(view, page_number, page_size,
+                                        sort_key='价格变化', ascending=False, key=np.abs,
+                                        columns=['机型', '店铺', '尺寸', '最新价格', '前次价格',
+                                                 '价格变化', '变化幅度', '变化日期'])
+        current_page_data = current_page_data.assign(变化日期=current_page_data['变化日期'].dt.strftime('%Y-%m-%d'))
+
+        # 美化表格
+        html_table = current_page_data.to_html(
+            escape=False,
+            index=False,
+            header=True,
+            formatters={'价格变化': format_price_change, '变化幅度': lambda x: f"{x:+.1f}%"}
+        )
+        st.write(html_table, unsafe_allow_html=True)
+
+
+@profiled_fragment("价格告警")
+def show_alerts(dataset):
+    # 入库时按滚动中位数/MAD 和历史最低价检测出的价格告警
+    st.header("🔔价格告警")
+    alerts = dataset.tables['alerts']
+    if alerts.empty:
+        st.info("暂无价格告警")
+        return
+
+    latest_day = alerts['爬取时间'].max().normalize()
+    latest_alerts = alerts[alerts['爬取时间'] >= latest_day]
+    alert_cols = st.columns(len(ALERT_TYPES))
+    for col, alert_type in zip(alert_cols, ALERT_TYPES):
+        col.metric(f"{alert_type}（{latest_day:%m-%d}）", int((latest_alerts['告警类型'] == alert_type).sum()),
+                   help=f"累计 {int((alerts['告警类型'] == alert_type).sum())} 条")
+    with st.expander("告警明细"):
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_types = st.multiselect("告警类型", ALERT_TYPES, default=ALERT_TYPES)
+        with col2:
+            alert_manufacturers = st.multiselect("厂商", sorted(alerts['厂商'].dropna().unique()))
+        alert_view = alerts[alerts['告警类型'].isin(selected_types)]
+        if alert_manufacturers:
+            alert_view = alert_view[alert_view['厂商'].isin(alert_manufacturers)]
+        st.dataframe(
+            alert_view.head(200),
+            column_config={
+                '价格': st.column_config.NumberColumn(format="¥%.0f"),
+                '参考价格': st.column_config.NumberColumn("滚动中位价", format="¥%.0f"),
+                '历史最低': st.column_config.NumberColumn(format="¥%.0f"),
+                '变化幅度': st.column_config.NumberColumn(format="%+.1f%%"),
+                '偏离程度': st.column_config.NumberColumn(format="%.1f"),
+            },
+            hide_index=True,
+        )
+
+
+def show_distributions(dataset):
+    aggregates = dataset.tables['aggregates']
     # 第二行：价格和尺寸分析
     col1, col2 = st.columns(2)
 
     with col1:
         # 价格占比图表
-        price_bins = pd.cut(df['清洗价格'], bins=[0, 1000, 2000, 3000, 4000, 5000, 10000, float('inf')])
-        price_counts = price_bins.value_counts().sort_index()
-        fig = px.pie(values=price_counts.values, 
-                    names=price_counts.index.astype(str), 
+        price_counts = price_bucket_counts(aggregates)
+        fig = px.pie(values=price_counts.values,
+                    names=price_counts.index,
                     title="价格区间占比",
                     labels={"names": "价格区间", "values": "数量"})
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
-        size_counts = df['尺寸'].value_counts()
-        fig = px.bar(x=size_counts.index,
-                     y=size_counts.values,
+        sizes = size_counts(aggregates)
+        fig = px.bar(x=sizes.index,
+                     y=sizes.values,
                      title="尺寸分布",
                      labels={"x": "尺寸", "y": "数量"})
         st.plotly_chart(fig, use_container_width=True)
 
+
+@profiled_fragment("趋势")
+def show_trends(dataset):
+    """厂商/机型/粒度/时间范围的筛选与两张趋势图，调整筛选条件只重跑这一部分"""
+    profile = profiling.current()
+
     # 新增筛选控件
     st.subheader("产品价格 & 评论数量波动变化")
+    filter_index = dataset.derived('filter_index', FilterIndex)
     with st.container():
         col1, col2 = st.columns(2)
         with col1:
             selected_manufacturer = st.selectbox(
-                "选择厂商", 
-                options=['全部'] + sorted(df['厂商'].unique()),
+                "选择厂商",
+                options=['全部'] + filter_index.options('厂商'),
                 index=0  # 默认选择全部
             )
         with col2:
             if selected_manufacturer == '全部':
                 # 如果选择全部，默认显示小米的前5个机型
-                default_models = sorted(df[df['厂商'] == '小米']['机型'].unique())[:5]
+                default_models = manufacturer_models(dataset, '小米')[:5]
                 selected_models = st.multiselect(
                     "选择机型（可多选）",
-                    options=sorted(df['机型'].unique()),
+                    options=filter_index.options('机型'),
                     default=default_models
                 )
             else:
                 # 如果选择了特定厂商，显示该厂商的任意五个机型
-                manufacturer_models = sorted(df[df['厂商'] == selected_manufacturer]['机型'].unique())
-                default_models = manufacturer_models[:5]  # 默认选择任意五个机型
+                models = manufacturer_models(dataset, selected_manufacturer)
+                default_models = models[:5]  # 默认选择任意五个机型
                 selected_models = st.multiselect(
                     "选择机型（可多选）",
-                    options=manufacturer_models,
+                    options=models,
                     default=default_models
                 )
 
-    # 筛选数据
-    filtered_df = df.copy()
-    if selected_manufacturer != '全部':
-        filtered_df = filtered_df[filtered_df['厂商'] == selected_manufacturer]
-    if selected_models:  # 改为使用选中的多个机型
-        filtered_df = filtered_df[filtered_df['机型'].isin(selected_models)]
-    elif selected_manufacturer == '小米':  # 如果是小米但没有选择机型，默认显示前5个
-        default_models = sorted(df[df['厂商'] == '小米']['机型'].unique())[:5]
-        filtered_df = filtered_df[filtered_df['机型'].isin(default_models)]
+    # 时间粒度和范围：趋势数据按粒度重采样并限制每条曲线的点数
+    col1, col2 = st.columns(2)
+    with col1:
+        granularity = st.radio("时间粒度", GRANULARITIES, index=1, horizontal=True)
+    with col2:
+        first_day, last_day = crawl_date_range(dataset)
+        date_range = st.date_input("时间范围", value=(first_day, last_day),
+                                   min_value=first_day, max_value=last_day)
+    # 只选了开始日期时，结束日期取最后一天
+    start_day, end_day = (tuple(date_range) + (last_day,))[:2]
+
+    model_filter = selected_models
+    if not selected_models and selected_manufacturer == '小米':  # 如果是小米但没有选择机型，默认显示前5个
+        model_filter = manufacturer_models(dataset, '小米')[:5]
+    with profile.cache('load_trends'):
+        price_df, comment_df = load_trends(
+            dataset, dataset.version, selected_manufacturer, tuple(model_filter), granularity, start_day, end_day
+        )
+    profile.record_frame('价格趋势', price_df)
 
     # 如果不为空，绘制价格评论波动图表
-    if not filtered_df.empty:
+    if not price_df.empty:
         # 创建两列布局
         col1, col2 = st.columns(2)
-        
+
         with col1:
             # 价格波动折线图 - 按机型分组
-            price_df = filtered_df.groupby(['爬取时间', '机型'])['清洗价格'].mean().reset_index()
-            fig = px.line(price_df, 
+            fig = px.line(price_df,
                          x='爬取时间',
-                         y='清洗价格',
+                         y='均值',
                          color='机型',  # 按机型分组显示不同颜色
+                         hover_data=['最低', '最高', '最新'],
                          title=f'{selected_manufacturer} 价格波动趋势',
-                         labels={'爬取时间': '日期', '清洗价格': '价格'})
+                         labels={'爬取时间': '日期', '均值': '价格'})
             fig.update_xaxes(tickformat='%Y-%m-%d', tickmode='auto')
             fig.update_layout(
                 hovermode='x unified',
@@ -302,40 +301,77 @@ def show_overview(df):
                 )
             )
             st.plotly_chart(fig, use_container_width=True)
-        
+
         with col2:
             # 评论数波动折线图
-            if '评论数' in filtered_df.columns:
-                try:
-                    # 将评论数转换为数值
-                    filtered_df['处理评论数'] = filtered_df['评论数'].apply(lambda x: 
-                        float(str(x).replace('万+', '0000').replace('万', '0000')
-                              .replace('+', '').replace(',', ''))
-                        if pd.notnull(x) else 0
+            if comment_df is not None:
+                # 评论数在入库时已解析为整数
+                fig = px.line(comment_df,
+                            x='爬取时间',
+                            y='均值',
+                            color='机型',  # 按机型分组显示不同颜色
+                            hover_data=['最低', '最高', '最新'],
+                            title=f'{selected_manufacturer} 评论数趋势',
+                            labels={'爬取时间': '日期', '均值': '评论数'})
+                fig.update_xaxes(tickformat='%Y-%m-%d', tickmode='auto')
+                fig.update_layout(
+                    hovermode='x unified',
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=1.02,
+                        xanchor="right",
+                        x=1
                     )
-                    
-                    comment_df = filtered_df.groupby(['爬取时间', '机型'])['处理评论数'].mean().reset_index()
-                    fig = px.line(comment_df, 
-                                x='爬取时间',
-                                y='处理评论数',
-                                color='机型',  # 按机型分组显示不同颜色
-                                title=f'{selected_manufacturer} 评论数趋势',
-                                labels={'爬取时间': '日期', '处理评论数': '评论数'})
-                    fig.update_xaxes(tickformat='%Y-%m-%d', tickmode='auto')
-                    fig.update_layout(
-                        hovermode='x unified',
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="right",
-                            x=1
-                        )
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                except Exception as e:
-                    st.warning(f"处理评论数据时出错: {str(e)}")
+                )
+                st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("未找到评论数据列")
 
-   
\ No newline at end of file
+
+def show_overview(dataset):
+    """
+    数据概览页。带控件的区块（词云、各厂商价格变化表格、告警明细、趋势）都是独立的片段，
+    操作其中的控件只重跑该片段；整页重跑时各区块的数据都来自按数据版本缓存的派生结果。
+    """
+    st.title('京东电视商品数据分析平台')
+    df = dataset.df
+    profile = profiling.current()
+
+    # 在标题下方添加数据范围和更新日期说明
+    st.markdown("""
+    <div style='font-size: 0.9rem; color: gray;'>
+        数据范围：全国 | 最新更新日期：{update_date}
+    </div>
+    """.format(update_date=df['爬取时间'].max().strftime('%Y-%m-%d %H:%M')), unsafe_allow_html=True)
+
+    # 在侧边栏添加刷新数据按钮
+    if st.sidebar.button("刷新数据"):
+        worker = refresh_worker.worker()
+        if worker is not None:
+            # 由后台线程立即检查并入库，完成后新的重跑自动使用新版本，不阻塞当前会话
+            worker.request()
+            st.toast("已在后台检查新数据，入库完成后自动切换")
+        else:
+            # 未启用后台刷新时在当前会话入库，数据版本变化时才重新加载，然后重新渲染页面
+            registry.refresh()
+            st.rerun()
+
+    with profile.section("侧边栏指标"):
+        show_sidebar_metrics(dataset)
+
+    show_wordclouds(dataset)
+
+    # 价格监控告警区域
+    st.header("📊价格变化最大的商品TOP5")
+    st.markdown("<div style='font-size: 0.9rem; color: gray;'>价格变化逻辑：计算每个商品的最新价格与前一次价格的差异。</div>", unsafe_allow_html=True)
+    profile.record_frame('价格变化', dataset_price_changes(dataset))
+    for manufacturer in MANUFACTURERS:
+        show_price_change_table(dataset, manufacturer)
+
+    show_alerts(dataset)
+
+    with profile.section("分布图"):
+        show_distributions(dataset)
+
+    show_trends(dataset)
@@ -1,92 +1,47 @@
+import time
+
+# 脚本开始执行的时间，用于记录进程内首次渲染的耗时
+script_started = time.perf_counter()
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 import io
 from pathlib import Path
+from utils.profile_panel import profile_toggle, show_profile_panel
+from utils import profiling, refresh_worker
+from utils.dataset_registry import registry
+from utils.panel_data import PANEL_FILE, company_trend, load_panel_prices, panel_version
+from utils.panel_retail import build_panel_retail, lag_correlation, panel_monthly, rolling_correlation
 
 # 添加缓存装饰器提升加载性能
 @st.cache_data(ttl=3600)
-def load_data(sheet_name):
+def load_data():
+    """
+    读取全部工作表的面板价格长表（Sheet, Company, Size, ..., Period, Forecast, Value）。
+    工作簿只在内容变化时重新解析，之后直接读取列式缓存。
+    """
+    profiling.current().cache_miss('load_data')
     try:
         # 检查文件是否存在
-        if not Path('data/AVC-全球TV面板价格月度数据报告.xlsx').exists():
+        if not Path(PANEL_FILE).exists():
             raise FileNotFoundError('数据文件未找到')
-            
-        df = pd.read_excel('data/AVC-全球TV面板价格月度数据报告.xlsx', sheet_name='Average')
-        
-        # 空值处理
-        df = df.dropna(subset=['Company', 'Size'])
-        df = df.ffill()
-        
-        # 预处理日期列
-        date_columns = [col for col in df.columns if isinstance(col, str) and '.' in col and len(col.split('.')[0]) == 2]
-        df[date_columns] = df[date_columns].apply(pd.to_numeric, errors='coerce')
-
-        years = sorted(set([col.split('.')[0] for col in date_columns if isinstance(col, str)]))
-        return df, date_columns, years
-    
+        return load_panel_prices()
+
     except FileNotFoundError as e:
         st.error(f'错误：{str(e)}，请检查文件路径')
     except Exception as e:
         st.error(f'数据处理失败：{str(e)}')
         st.error('原始数据格式可能有误，请检查Excel文件结构')
-    
-    return pd.DataFrame(), [], []
-
-st.title('TV面板价格数据分析')
-
-# 初始化数据
-if 'data_loaded' not in st.session_state:
-    df, date_columns, years = load_data('Sheet1')
-    if not df.empty:
-        st.session_state.df = df
-        st.session_state.date_columns = date_columns
-        st.session_state.years = years
-    st.session_state.data_loaded = True
-
-# 使用原生表格组件显示数据
-if 'df' in st.session_state and not st.session_state.df.empty:
-    st.header('数据概览')
-    st.dataframe(
-        st.session_state.df.head(100),
-        column_config={
-            "Company": "厂商",
-            "Size": "尺寸",
-            "Price": st.column_config.NumberColumn(format="¥%.2f")
-        },
-        hide_index=True,
-    )
 
-# # ... existing code ...
-if 'date_columns' in st.session_state:
-    date_columns = st.session_state.date_columns
-else:
-    st.error('日期列数据未正确加载，请检查数据文件。')
-    date_columns = []
-# # ... existing code ...
-
-# 替换matplotlib图表为Plotly交互式图表
-st.header('价格趋势分析')
-if date_columns:
-    selected_columns = st.multiselect('选择时间序列', date_columns, default=date_columns[:3])
-    fig = px.line(df.melt(id_vars=['Company'], value_vars=selected_columns), 
-                 x='variable', y='value', color='Company',
-                 title='面板价格趋势', labels={'variable':'日期','value':'价格'})
-    st.plotly_chart(fig)
-
-# 添加时间范围筛选功能
-if years:
-    start_year, end_year = st.slider('选择时间范围', 
-                                    min_value=int(min(years)), 
-                                    max_value=int(max(years)),
-                                    value=(int(min(years)), int(max(years))))
-    filtered_columns = [col for col in date_columns if start_year <= int(col.split('.')[0]) <= end_year]
-    
-    if filtered_columns:
-        st.header('时间序列分析')
-        fig = px.area(df[['Company'] + filtered_columns].set_index('Company').T,
-                     title=f'{start_year}-{end_year} 价格变化趋势')
-        st.plotly_chart(fig)
+    return pd.DataFrame()
+
+
+@st.cache_data(ttl=3600)
+def load_company_trend(sheet):
+    """某个价格类型下各厂商的月度均价，各图表只在这张表上按厂商和月份切片"""
+    profiling.current().cache_miss('load_company_trend')
+    return company_trend(load_data(), sheet)
 
 
 def generate_title_wordcloud(text):
@@ -102,38 +57,161 @@ def generate_title_wordcloud(text):
         colormap='Blues'
     )
     wordcloud.generate(text)
-    
+
     plt.figure(figsize=(24,12))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
-    
+
     buf = io.BytesIO()
     plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0)
     buf.seek(0)
     plt.close()
     return buf
 
-# 添加动态筛选控件
-with st.expander("高级筛选选项"):
+
+def show_panel_retail(df, sheet):
+    """面板成本与京东零售价格的对比、滑动相关和滞后分析"""
+    st.header('面板成本与零售价格')
+    dataset = registry.current()
+    # 京东零售数据的新快照由后台线程入库并切换版本
+    refresh_worker.start()
+    # 连接表按零售数据版本和面板工作簿版本缓存，切换尺寸和窗口时只在其上切片
+    joined = dataset.derived(f'panel_retail_{sheet}_{panel_version()}',
+                             lambda retail: build_panel_retail(retail, sheet))
+    matched = joined.dropna(subset=['面板价格'])
+    if matched.empty:
+        st.info('零售数据的日期范围内没有对应的面板价格')
+        return
+    if matched['面板预测值'].any():
+        st.caption('部分月份的面板价格为预测值')
+
+    sizes = sorted(matched['尺寸数值'].unique())
+    selected_sizes = st.multiselect('选择尺寸', sizes, default=sizes[:3], format_func=lambda s: f'{s:g}寸')
+    if not selected_sizes:
+        return
+    view = matched[matched['尺寸数值'].isin(selected_sizes)].assign(尺寸=lambda d: d['尺寸数值'].map('{:g}寸'.format))
     col1, col2 = st.columns(2)
     with col1:
-        selected_years = st.multiselect('选择年份', options=years, default=years[-2:])
+        fig = px.line(view, x='日期', y='零售均价', color='尺寸', title='零售均价')
+        st.plotly_chart(fig)
     with col2:
-        if 'df' in st.session_state and not st.session_state.df.empty and 'Company' in st.session_state.df.columns:
-            selected_companies = st.multiselect('选择厂商', options=st.session_state.df['Company'].unique(), default=st.session_state.df['Company'].unique()[:3])
-
-# 应用筛选条件
-if 'Company' in df.columns:
-    filtered_df = df[df['Company'].isin(selected_companies)]
-else:
-    st.error("数据中不存在'Company'列，请检查数据。")
-    filtered_df = pd.DataFrame()
-filtered_columns = [col for col in date_columns if col.split('.')[0] in selected_years]
-
-# 展示筛选后的分析结果
-if not filtered_df.empty and filtered_columns:
-    st.header('筛选结果分析')
-    fig = px.line(filtered_df.melt(id_vars=['Company'], value_vars=filtered_columns),
-                 x='variable', y='value', color='Company',
-                 title='筛选时间段价格趋势', labels={'variable':'日期','value':'价格'})
-    st.plotly_chart(fig)
\ No newline at end of file
+        fig = px.line(view, x='面板月份', y='面板价格', color='尺寸', title='面板价格（美元）')
+        st.plotly_chart(fig)
+
+    window = st.slider('滑动窗口（天）', min_value=3, max_value=90, value=30)
+    corr = rolling_correlation(joined, window=window, min_periods=min(window, 3))
+    corr = corr[[s for s in selected_sizes if s in corr.columns]].dropna(how='all')
+    if corr.empty:
+        st.info('窗口内的面板价格没有变化，暂无法计算滑动相关系数')
+    else:
+        corr = corr.rename(columns='{:g}寸'.format).rename_axis(columns='尺寸').reset_index()
+        corr = corr.melt(id_vars='日期', var_name='尺寸', value_name='相关系数').dropna()
+        fig = px.line(corr, x='日期', y='相关系数', color='尺寸', title=f'{window}天滑动相关系数')
+        st.plotly_chart(fig)
+
+    lags = lag_correlation(joined, panel_monthly(df, sheet))
+    lags = lags[[s for s in selected_sizes if s in lags.columns]].rename(columns='{:g}寸'.format)
+    st.subheader('面板价格领先零售价格的相关系数')
+    st.dataframe(lags.style.format('{:.2f}', na_rep='-'))
+
+
+def show_panel_prices():
+    st.title('TV面板价格数据分析')
+    profile = profiling.current()
+
+    # 初始化数据
+    with profile.cache('load_data'):
+        df = load_data()
+    if df.empty:
+        st.error('面板价格数据未正确加载，请检查数据文件。')
+        return
+    profile.record_frame('面板价格长表', df)
+
+    sheet = st.selectbox('价格类型', options=list(df['Sheet'].cat.categories))
+    sheet_df = df[df['Sheet'] == sheet]
+    with profile.cache('load_company_trend'):
+        trend = load_company_trend(sheet)
+    periods = sorted(trend['Period'].unique())
+    years = sorted({period.year for period in pd.to_datetime(periods)})
+
+    with profile.section("数据概览"):
+        # 使用原生表格组件显示数据
+        st.header('数据概览')
+        st.dataframe(
+            sheet_df.head(100),
+            column_config={
+                "Company": "厂商",
+                "Size": "尺寸",
+                "Period": st.column_config.DateColumn("月份", format="YYYY-MM"),
+                "Forecast": "预测值",
+                "Value": st.column_config.NumberColumn("价格", format="¥%.2f")
+            },
+            hide_index=True,
+        )
+
+    with profile.section("价格趋势分析"):
+        # 替换matplotlib图表为Plotly交互式图表
+        st.header('价格趋势分析')
+        period_labels = [f"{pd.Timestamp(p):%Y-%m}" for p in periods]
+        selected_labels = st.multiselect('选择时间序列', period_labels, default=period_labels[:3])
+        if selected_labels:
+            selected_periods = pd.to_datetime(selected_labels)
+            fig = px.line(trend[trend['Period'].isin(selected_periods)], x='Period', y='Value', color='Company',
+                          title='面板价格趋势', labels={'Period': '日期', 'Value': '价格'})
+            st.plotly_chart(fig)
+
+    with profile.section("时间序列分析"):
+        # 添加时间范围筛选功能
+        start_year, end_year = st.slider('选择时间范围',
+                                        min_value=years[0],
+                                        max_value=years[-1],
+                                        value=(years[0], years[-1]))
+        years_trend = trend[trend['Period'].dt.year.between(start_year, end_year)]
+        if not years_trend.empty:
+            st.header('时间序列分析')
+            fig = px.area(years_trend, x='Period', y='Value', color='Company',
+                          title=f'{start_year}-{end_year} 价格变化趋势',
+                          labels={'Period': '日期', 'Value': '价格'})
+            st.plotly_chart(fig)
+
+    with profile.section("高级筛选"):
+        # 添加动态筛选控件
+        companies = list(trend['Company'].unique())
+        with st.expander("高级筛选选项"):
+            col1, col2 = st.columns(2)
+            with col1:
+                selected_years = st.multiselect('选择年份', options=years, default=years[-2:])
+            with col2:
+                selected_companies = st.multiselect('选择厂商', options=companies, default=companies[:3])
+
+        # 应用筛选条件
+        filtered = pd.DataFrame()
+        if selected_companies and selected_years:
+            filtered = trend[trend['Company'].isin(selected_companies) & trend['Period'].dt.year.isin(selected_years)]
+
+        # 展示筛选后的分析结果
+        if not filtered.empty:
+            st.header('筛选结果分析')
+            fig = px.line(filtered, x='Period', y='Value', color='Company',
+                          title='筛选时间段价格趋势', labels={'Period': '日期', 'Value': '价格'})
+            st.plotly_chart(fig)
+
+    with profile.section("面板成本与零售价格"):
+        show_panel_retail(df, sheet)
+
+
+def main():
+    # 开启性能分析时记录本次重跑各区块的耗时，页面底部展示并写入日志
+    profile = profiling.start('TV面板价格') if profile_toggle() else None
+    try:
+        show_panel_prices()
+    finally:
+        if profile is not None:
+            profiling.stop()
+    profiling.record_startup('TV面板价格', time.perf_counter() - script_started)
+    if profile is not None:
+        show_profile_panel(profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import STORE_DIR, read_frame, write_frame
+
+AGGREGATES_DIR = STORE_DIR / "aggregates"
+
+# 价格区间划分，与数据概览页的价格区间占比图一致
+PRICE_BINS = [0, 1000, 2000, 3000, 4000, 5000, 10000, float('inf')]
+PRICE_BIN_LABELS = list(pd.IntervalIndex.from_breaks(PRICE_BINS).astype(str))
+
+CUBE_KEYS = ['日期', '厂商', '尺寸', '价格区间']
+
+# cube:       (日期, 厂商, 尺寸, 价格区间) -> 数量, 价格合计, 最低价格, 最高价格
+# price_hist: (日期, 清洗价格) -> 数量，用于按天精确计算均值/中位数/极值
+# day_models: (日期, 机型) 去重，用于按天统计商品数
+# 三张表都可以由新增行单独聚合后与已有结果合并，入库时无需回读历史数据
+TABLES = ('cube', 'price_hist', 'day_models')
+
+
+def aggregate_frame(df):
+    """把一批明细行聚合成三张汇总表"""
+    rows = pd.DataFrame({
+        '日期': df['爬取时间'].dt.normalize(),
+        '厂商': df['厂商'].astype('string'),
+        '尺寸': df['尺寸'].astype('string'),
+        '机型': df['机型'].astype('string'),
+        '清洗价格': df['清洗价格'].astype(float),
+        # 价格缺失或不在区间内记为 -1
+        '价格区间': pd.cut(df['清洗价格'], bins=PRICE_BINS, labels=False).fillna(-1).astype('int8'),
+    })
+    cube = rows.groupby(CUBE_KEYS, dropna=False).agg(
+        数量=('价格区间', 'size'),
+        价格合计=('清洗价格', 'sum'),
+        最低价格=('清洗价格', 'min'),
+        最高价格=('清洗价格', 'max'),
+    ).reset_index()
+    price_hist = rows.groupby(['日期', '清洗价格'], dropna=False).size().rename('数量').reset_index()
+    day_models = rows[['日期', '机型']].drop_duplicates()
+    return {'cube': cube, 'price_hist': price_hist, 'day_models': day_models}
+
+
+def merge_aggregates(old, new):
+    """合并两组汇总表（对应的明细行互不重复）"""
+    cube = pd.concat([old['cube'], new['cube']], ignore_index=True).groupby(CUBE_KEYS, dropna=False).agg(
+        数量=('数量', 'sum'),
+        价格合计=('价格合计', 'sum'),
+        最低价格=('最低价格', 'min'),
+        最高价格=('最高价格', 'max'),
+    ).reset_index()
+    price_hist = pd.concat([old['price_hist'], new['price_hist']], ignore_index=True).groupby(
+        ['日期', '清洗价格'], dropna=False)['数量'].sum().reset_index()
+    day_models = pd.concat([old['day_models'], new['day_models']], ignore_index=True).drop_duplicates()
+    return {'cube': cube, 'price_hist': price_hist, 'day_models': day_models}
+
+
+def aggregates_exist():
+    return all((AGGREGATES_DIR / f"{name}.parquet").exists() for name in TABLES)
+
+
+def load_aggregates():
+    return {name: read_frame(AGGREGATES_DIR / f"{name}.parquet") for name in TABLES}
+
+
+def save_aggregates(aggregates):
+    for name in TABLES:
+        write_frame(aggregates[name], AGGREGATES_DIR / f"{name}.parquet")
+
+
+def update_aggregates(delta):
+    """入库时调用：把新增行的汇总合并进已有汇总表"""
+    new = aggregate_frame(delta)
+    if aggregates_exist():
+        new = merge_aggregates(load_aggregates(), new)
+    save_aggregates(new)
+
+
+def rebuild_aggregates(df):
+    """由全部明细重建汇总表（存储格式升级或汇总表缺失时使用）"""
+    if AGGREGATES_DIR.exists():
+        shutil.rmtree(AGGREGATES_DIR)
+    save_aggregates(aggregate_frame(df))
+
+
+def _weighted_median(prices, counts):
+    order = np.argsort(prices)
+    prices, cumulative = prices[order], np.cumsum(counts[order])
+    total = cumulative[-1]
+    lower = prices[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+    upper = prices[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+
+def daily_metrics(aggregates):
+    """
+    按爬取日期汇总的侧边栏指标，按日期升序：
+    商品数（去重机型）、平均价格、中位数、最高价格、最低价格。
+    """
+    hist = aggregates['price_hist'].dropna()
+    hist = hist[hist['数量'] > 0]
+    rows = []
+    for day, group in hist.groupby('日期', sort=True):
+        prices = group['清洗价格'].to_numpy(dtype=float)
+        counts = group['数量'].to_numpy()
+        rows.append({
+            '日期': day,
+            '平均价格': np.dot(prices, counts) / counts.sum(),
+            '中位数': _weighted_median(prices, counts),
+            '最高价格': prices.max(),
+            '最低价格': prices.min(),
+        })
+    metrics = pd.DataFrame(rows, columns=['日期', '平均价格', '中位数', '最高价格', '最低价格']).set_index('日期')
+    models = aggregates['day_models'].dropna(subset=['日期']).groupby('日期')['机型'].nunique()
+    metrics.insert(0, '商品数', models.reindex(metrics.index).fillna(0).astype(int))
+    return metrics
+
+
+def price_bucket_counts(aggregates):
+    """各价格区间的商品记录数，按区间顺序"""
+    cube = aggregates['cube']
+    counts = cube[cube['价格区间'] >= 0].groupby('价格区间')['数量'].sum()
+    counts = counts.reindex(range(len(PRICE_BIN_LABELS)), fill_value=0)
+    counts.index = PRICE_BIN_LABELS
+    return counts[counts > 0]
+
+
+def size_counts(aggregates):
+    """各尺寸的商品记录数，按数量降序"""
+    return aggregates['cube'].groupby('尺寸')['数量'].sum().sort_values(ascending=False)
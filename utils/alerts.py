@@ -0,0 +1,185 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from utils.data_store import STORE_DIR, read_frame, write_frame
+from utils.products import GENERIC_MODEL
+
+ALERTS_DIR = STORE_DIR / "alerts"
+STATE_FILE = ALERTS_DIR / "state.parquet"
+
+# 与商品表（utils.products）的链接相同：同一厂商、机型、尺寸在同一店铺视为一条链接，
+# 同一机型的不同尺寸价格不可比，不能共用一个窗口
+LISTING_COLUMNS = ['厂商', '机型', '尺寸', '店铺']
+
+# 每个商品保留最近 WINDOW 次价格用于滚动中位数/MAD
+WINDOW = 30
+# 历史记录少于该次数的商品不做判断
+MIN_HISTORY = 5
+# 稳健 z 分数超过该阈值视为异常
+MAD_THRESHOLD = 3.5
+# MAD 为 0（价格长期不变）时，按中位数的该比例作为最小离散度
+MIN_RELATIVE_SCALE = 0.02
+# 正态分布下 MAD 与标准差的换算系数
+MAD_SCALE = 1.4826
+
+ALERT_TYPES = ['价格骤降', '价格异常上涨', '历史新低']
+ALERT_COLUMNS = ['爬取时间', '厂商', '机型', '店铺', '尺寸', '告警类型',
+                 '价格', '参考价格', '历史最低', '变化幅度', '偏离程度']
+
+# state 每行一个商品：键列、已处理的最新爬取时间、历史最低价、记录数，以及 p0..p{WINDOW-1}
+# 最近 WINDOW 次价格（右对齐，最新的在最后，不足时前面为空）。
+# 新增行只需与 state 比较，检测开销与新增行数成正比，不回读历史明细。
+WINDOW_COLUMNS = [f"p{i}" for i in range(WINDOW)]
+
+
+def empty_state():
+    state = pd.DataFrame({column: pd.Series(dtype='string') for column in LISTING_COLUMNS})
+    state['最新时间'] = pd.Series(dtype='datetime64[ns]')
+    state['历史最低'] = pd.Series(dtype='float64')
+    state['记录数'] = pd.Series(dtype='int64')
+    for column in WINDOW_COLUMNS:
+        state[column] = pd.Series(dtype='float64')
+    return state
+
+
+def alerts_exist():
+    """告警状态存在且结构与当前版本一致；由旧版本生成的状态需要重建"""
+    if not STATE_FILE.exists():
+        return False
+    return pq.read_schema(STATE_FILE).names == list(empty_state().columns)
+
+
+def load_state():
+    if STATE_FILE.exists():
+        return read_frame(STATE_FILE)
+    return empty_state()
+
+
+def detect_alerts(delta, state):
+    """
+    按时间顺序把新增行与各商品的历史状态比较，返回 (告警, 更新后的 state)。
+    每个商品在新增数据中的第 k 次价格都与它之前的 WINDOW 次价格比较，
+    所有商品、所有次序在一个 (商品数, 次数, WINDOW) 的数组上一次算完。
+    """
+    rows = pd.DataFrame({
+        '爬取时间': delta['爬取时间'],
+        '厂商': delta['厂商'].astype('string'),
+        '机型': delta['机型'].astype('string'),
+        '店铺': delta['店铺'].astype('string'),
+        '尺寸': delta['尺寸'].astype('string'),
+        '价格': delta['清洗价格'].astype(float),
+    }).dropna(subset=['爬取时间', '价格'] + LISTING_COLUMNS)
+    # “通用型号”下混有不同商品，价格不可比
+    rows = rows[rows['机型'] != GENERIC_MODEL]
+    if rows.empty:
+        return pd.DataFrame(columns=ALERT_COLUMNS), state
+
+    # 新增行对应到 state 中的商品，新商品追加到 state 末尾
+    state_index = pd.MultiIndex.from_frame(state[LISTING_COLUMNS])
+    listings = rows[LISTING_COLUMNS].drop_duplicates()
+    positions = state_index.get_indexer(pd.MultiIndex.from_frame(listings))
+    new_listings = listings[positions < 0]
+    if len(new_listings):
+        new_state = new_listings.reindex(columns=state.columns).assign(记录数=0).astype(state.dtypes.to_dict())
+        state = (new_state if state.empty else pd.concat([state, new_state])).reset_index(drop=True)
+        state_index = pd.MultiIndex.from_frame(state[LISTING_COLUMNS])
+    rows['商品'] = state_index.get_indexer(pd.MultiIndex.from_frame(rows[LISTING_COLUMNS]))
+
+    # 爬取批次有重叠时，新增行可能不晚于该商品已处理过的最新记录。窗口和历史最低只能按时间
+    # 向后追加，这些迟到的记录既不参与检测也不写入 state
+    latest_seen = state['最新时间'].to_numpy(dtype='datetime64[ns]')[rows['商品'].to_numpy()]
+    rows = rows[~(rows['爬取时间'].to_numpy() <= latest_seen)]
+    if rows.empty:
+        return pd.DataFrame(columns=ALERT_COLUMNS), state
+
+    # 每个商品的新增价格按时间排成一行：次序 k 对应第 WINDOW + k 列
+    rows = rows.sort_values(['商品', '爬取时间'], kind='stable')
+    rows['次序'] = rows.groupby('商品').cumcount()
+    touched, slot = np.unique(rows['商品'].to_numpy(), return_inverse=True)
+    counts = np.bincount(slot)
+    depth = int(counts.max())
+    prices = np.full((len(touched), WINDOW + depth), np.nan)
+    prices[:, :WINDOW] = state[WINDOW_COLUMNS].to_numpy(dtype=float)[touched]
+    prices[slot, WINDOW + rows['次序'].to_numpy()] = rows['价格'].to_numpy()
+
+    # 第 k 次价格之前的 WINDOW 次价格：(商品数, 次数, WINDOW)
+    windows = np.lib.stride_tricks.sliding_window_view(prices, WINDOW, axis=1)[:, :depth]
+    history = (~np.isnan(windows)).sum(axis=2)
+    filled = history > 0
+    median = np.full(history.shape, np.nan)
+    mad = np.full(history.shape, np.nan)
+    median[filled] = np.nanmedian(windows[filled], axis=1)
+    mad[filled] = np.nanmedian(np.abs(windows[filled] - median[filled][:, None]), axis=1)
+
+    # 第 k 次之前的历史最低价：state 中的历史最低与新增数据中前 k-1 次的累计最低
+    previous_low = state['历史最低'].to_numpy(dtype=float)[touched]
+    new_prices = np.where(np.isnan(prices[:, WINDOW:]), np.inf, prices[:, WINDOW:])
+    running_low = np.minimum.accumulate(new_prices, axis=1)
+    lows = np.fmin(previous_low[:, None], np.concatenate(
+        [np.full((len(touched), 1), np.inf), running_low[:, :-1]], axis=1))
+    lows[np.isinf(lows)] = np.nan
+
+    # 取出每个新增行对应的统计量
+    k = rows['次序'].to_numpy()
+    price = rows['价格'].to_numpy()
+    ref = median[slot, k]
+    low = lows[slot, k]
+    enough = history[slot, k] >= MIN_HISTORY
+    scale = np.fmax(MAD_SCALE * mad[slot, k], MIN_RELATIVE_SCALE * np.abs(ref))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = (price - ref) / scale
+
+    alert_type = np.full(len(rows), None, dtype=object)
+    alert_type[enough & (score > MAD_THRESHOLD)] = '价格异常上涨'
+    alert_type[enough & (score < -MAD_THRESHOLD)] = '价格骤降'
+    # 同时满足时“历史新低”优先
+    alert_type[enough & (price < low)] = '历史新低'
+
+    rows['参考价格'] = ref
+    rows['历史最低'] = low
+    rows['偏离程度'] = score
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rows['变化幅度'] = (price - ref) / ref * 100
+    rows['告警类型'] = alert_type
+    alerts = rows[rows['告警类型'].notna()].sort_values('爬取时间', kind='stable')[ALERT_COLUMNS]
+
+    # 更新 state：窗口取每个商品最后 WINDOW 次价格，历史最低和记录数累加
+    columns = counts[:, None] + np.arange(WINDOW)
+    state.loc[touched, WINDOW_COLUMNS] = prices[np.arange(len(touched))[:, None], columns]
+    state.loc[touched, '历史最低'] = np.fmin(previous_low, running_low[:, -1])
+    state.loc[touched, '记录数'] = state['记录数'].to_numpy()[touched] + counts
+    state.loc[touched, '最新时间'] = rows.groupby('商品')['爬取时间'].max().loc[touched].to_numpy()
+    return alerts.reset_index(drop=True), state
+
+
+def update_alerts(delta, part_name):
+    """入库时调用：检测新增行中的告警，写入与历史分片同名的告警分片并保存状态"""
+    alerts, state = detect_alerts(delta, load_state())
+    if len(alerts):
+        write_frame(alerts, ALERTS_DIR / part_name)
+    write_frame(state, STATE_FILE)
+    return len(alerts)
+
+
+def rebuild_alerts(parts):
+    """按入库顺序对 [(分片名, 明细), ...] 重新检测（存储格式升级或告警表缺失时使用）"""
+    if ALERTS_DIR.exists():
+        shutil.rmtree(ALERTS_DIR)
+    state = empty_state()
+    for part_name, delta in parts:
+        alerts, state = detect_alerts(delta, state)
+        if len(alerts):
+            write_frame(alerts, ALERTS_DIR / part_name)
+    write_frame(state, STATE_FILE)
+
+
+def load_alerts():
+    """读取全部告警，按爬取时间倒序"""
+    parts = sorted(ALERTS_DIR.glob("part-*.parquet")) if ALERTS_DIR.exists() else []
+    if not parts:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    alerts = pd.concat([read_frame(path) for path in parts], ignore_index=True)
+    return alerts.sort_values('爬取时间', ascending=False, kind='stable').reset_index(drop=True)
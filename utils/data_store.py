@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.normalize import normalize_frame
+
+DATA_DIR = Path("data")
+STORE_DIR = DATA_DIR / "store"
+SNAPSHOT_MANIFEST = STORE_DIR / "snapshots.json"
+LOCK_FILE = STORE_DIR / ".lock"
+
+# 存储格式版本，列类型或转换逻辑变化时递增，旧的列式文件会被重新生成
+SCHEMA_VERSION = 4
+
+# 低基数的文本列使用分类编码
+CATEGORICAL_COLUMNS = ['厂商', '机型', '店铺', '尺寸']
+
+
+_lock = threading.RLock()
+_lock_depth = 0
+_lock_handle = None
+
+
+def _lock_file(handle):
+    if os.name == 'nt':
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(handle):
+    if os.name == 'nt':
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def store_lock():
+    """
+    独占 data/store 的读写：看板、查询服务等多个进程各自有后台刷新线程，
+    入库和读取同一版本的数据都要在锁内完成。同一进程内可以嵌套获取。
+    """
+    global _lock_depth, _lock_handle
+    with _lock:
+        if _lock_depth == 0:
+            STORE_DIR.mkdir(parents=True, exist_ok=True)
+            _lock_handle = open(LOCK_FILE, 'a+b')
+            try:
+                _lock_file(_lock_handle)
+            except BaseException:
+                _lock_handle.close()
+                raise
+        _lock_depth += 1
+        try:
+            yield
+        finally:
+            _lock_depth -= 1
+            if _lock_depth == 0:
+                _unlock_file(_lock_handle)
+                _lock_handle.close()
+                _lock_handle = None
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    """按块计算文件的 SHA1，避免一次性读入大文件"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest():
+    if SNAPSHOT_MANIFEST.exists():
+        return json.loads(SNAPSHOT_MANIFEST.read_text(encoding='utf-8'))
+    return {}
+
+
+def _save_manifest(manifest):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = SNAPSHOT_MANIFEST.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    tmp_path.replace(SNAPSHOT_MANIFEST)
+
+
+def to_typed_frame(df):
+    """统一列类型：时间列转为 datetime，维度列分类编码，其余文本列转为字符串"""
+    df = df.copy()
+    if '爬取时间' in df.columns:
+        df['爬取时间'] = pd.to_datetime(df['爬取时间'])
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('string').astype('category')
+    # Excel 中同一列可能混有数字和文本，统一成字符串才能写入列式存储
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype('string')
+    return df
+
+
+def write_frame(df, path):
+    """原子地把 DataFrame 写成 Parquet 文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+
+
+def read_frame(path, columns=None):
+    """以内存映射方式读取 Parquet 文件，分类列会还原为 category 类型"""
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def _is_fresh(entry, source, stat):
+    """判断已转换的列式文件是否仍与源文件一致"""
+    if not entry or entry.get('schema') != SCHEMA_VERSION:
+        return False
+    if not (STORE_DIR / entry['parquet']).exists():
+        return False
+    if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+        return True
+    # 修改时间变化但内容未变（例如重新拷贝），只需更新记录
+    return entry['sha1'] == file_sha1(source)
+
+
+def read_snapshot_excel(source):
+    """读取清洗后的京东快照并规范化类型，返回 (DataFrame, 解析失败统计)"""
+    df, failures = normalize_frame(pd.read_excel(source))
+    return to_typed_frame(df), failures
+
+
+def convert_snapshot(source, reader=read_snapshot_excel):
+    """
+    将 Excel 文件转换为列式存储，返回 Parquet 文件路径。
+    reader(source) 返回 (DataFrame, 解析失败统计)，默认按京东快照的格式读取。
+    仅在源文件的修改时间和内容哈希都发生变化时才重新转换。
+    """
+    source = Path(source)
+    stat = source.stat()
+    manifest = _load_manifest()
+    entry = manifest.get(source.name)
+
+    if _is_fresh(entry, source, stat):
+        if entry['mtime'] != stat.st_mtime:
+            entry['mtime'] = stat.st_mtime
+            _save_manifest(manifest)
+        return STORE_DIR / entry['parquet']
+
+    df, failures = reader(source)
+    parquet_name = f"{source.stem}.parquet"
+    write_frame(df, STORE_DIR / parquet_name)
+
+    manifest[source.name] = {
+        'parquet': parquet_name,
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': file_sha1(source),
+        'rows': len(df),
+        'parse_failures': failures,
+        'schema': SCHEMA_VERSION,
+    }
+    _save_manifest(manifest)
+    return STORE_DIR / parquet_name
+
+
+def snapshot_sha1(source):
+    """已转换快照的源文件内容哈希，尚未转换时返回 None"""
+    entry = _load_manifest().get(Path(source).name)
+    return entry['sha1'] if entry else None
+
+
+def load_snapshot(source):
+    """读取快照数据，必要时先完成 Excel 到列式存储的转换"""
+    return read_frame(convert_snapshot(source))
+
+
+if __name__ == "__main__":
+    # 预先转换 data/ 下所有清洗后的快照：python -m utils.data_store
+    with store_lock():
+        for path in sorted(DATA_DIR.glob("*已清洗*.xlsx")):
+            print(f"{path.name} -> {convert_snapshot(path)}")
+            failures = _load_manifest()[path.name].get('parse_failures')
+            if failures:
+                print(f"  解析失败：{failures}")
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+from utils import profiling
+from utils.data_store import store_lock
+from utils.ingest import ingest_snapshots, load_history, load_store_tables
+
+# 最多同时保留的数据版本数：当前版本 + 刷新前仍在被旧会话使用的版本
+MAX_VERSIONS = 2
+
+
+class Dataset:
+    """
+    某个数据版本的只读数据集，进程内所有会话共享同一个对象，不做拷贝。
+    由它派生的索引、聚合结果通过 derived() 挂在同一版本下，随版本一起淘汰。
+    tables 是与 df 同一次入库后读取的汇总表、告警和商品表（见 load_store_tables），
+    派生结果应从这里取，而不是读取磁盘上可能已被后续入库更新的文件。
+    调用方不得原地修改 df 和 tables。
+    """
+
+    def __init__(self, version, df, tables=None):
+        self.version = version
+        self.df = df
+        self.tables = tables or {}
+        self.loaded_at = time.time()
+        self._derived = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def has_derived(self, name):
+        return name in self._derived
+
+    def derived(self, name, builder):
+        """返回以 name 缓存的派生结果，首次访问时调用 builder(df) 构建，并发访问只构建一次"""
+        profile = profiling.current()
+        if name in self._derived:
+            profile.cache_event(f"derived:{name}", True)
+            return self._derived[name]
+        start = time.perf_counter()
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            built = name not in self._derived
+            if built:
+                self._derived[name] = builder(self.df)
+        profile.cache_event(f"derived:{name}", not built, (time.perf_counter() - start) * 1000)
+        return self._derived[name]
+
+
+class DatasetRegistry:
+    """进程级的数据集注册表，按数据版本缓存数据集并淘汰旧版本"""
+
+    def __init__(self, max_versions=MAX_VERSIONS):
+        self.max_versions = max_versions
+        self._datasets = OrderedDict()
+        self._current = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """当前数据集；首次调用时加载"""
+        if self._current is None:
+            return self.refresh()
+        return self._current
+
+    def get(self, version):
+        return self._datasets.get(version)
+
+    def versions(self):
+        return list(self._datasets)
+
+    def _activate(self, version, df, tables, prepare=None):
+        df.attrs['data_version'] = version
+        dataset = Dataset(version, df, tables)
+        if prepare is not None:
+            # 在对外可见之前完成预构建，读取方拿到的要么是旧版本，要么是准备好的新版本
+            prepare(dataset)
+        self._datasets[version] = dataset
+        while len(self._datasets) > self.max_versions:
+            self._datasets.popitem(last=False)
+        self._current = dataset
+        return dataset
+
+    def refresh(self, prepare=None):
+        """
+        入库 data/ 下新增的快照；只有数据版本变化时才重新加载数据集。
+        prepare(dataset) 在新版本切换为当前版本之前调用，用于预构建派生结果。
+        刷新期间 current() 不加锁，继续返回旧版本；切换只是一次引用赋值。
+        已被淘汰的旧版本对象仍由正在渲染的会话持有，渲染结束后自然释放。
+        """
+        with self._lock, store_lock():
+            version = ingest_snapshots()
+            if self._current is not None and self._current.version == version:
+                return self._current
+            if version in self._datasets:
+                self._current = self._datasets[version]
+                self._datasets.move_to_end(version)
+                return self._current
+            # 明细和入库派生的表在同一把锁内、下一次入库之前读取，保证属于同一个版本
+            return self._activate(version, load_history(), load_store_tables(), prepare)
+
+
+# 进程内唯一的注册表，Streamlit 各会话和无界面调用方共用
+registry = DatasetRegistry()
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.aggregates import AGGREGATES_DIR, aggregates_exist, load_aggregates, rebuild_aggregates, update_aggregates
+from utils.alerts import ALERTS_DIR, alerts_exist, load_alerts, rebuild_alerts, update_alerts
+from utils.data_store import (
+    DATA_DIR, STORE_DIR, SCHEMA_VERSION,
+    file_sha1, load_snapshot, read_frame, store_lock, write_frame,
+)
+from utils.products import PRODUCTS_DIR, load_products, products_exist, rebuild_products, update_products
+
+HISTORY_DIR = STORE_DIR / "history"
+INGEST_MANIFEST = STORE_DIR / "ingest_manifest.json"
+KEYS_FILE = HISTORY_DIR / "keys.npy"
+# 各派生表已包含的历史分片数。派生表在新分片写入清单之前更新，入库中途失败时两者不一致，
+# 下次入库发现不一致就由清单中的分片重建该表，重试时同一批新增行不会被重复计入
+APPLIED_FILE = STORE_DIR / "applied.json"
+DERIVED_TABLES = ('aggregates', 'alerts', 'products')
+
+# 清洗后的快照文件命名规则，例如 20250304-0317已清洗new.xlsx
+SNAPSHOT_PATTERN = "*已清洗*.xlsx"
+
+# 只去掉完全重复的记录（重叠的爬取批次中同一条数据会出现多次）。
+# 同一店铺同一时刻的同一机型可能有多个尺寸，“通用型号”下更是不同商品，
+# 因此尺寸、标题和价格都属于键的一部分
+KEY_COLUMNS = ['厂商', '机型', '店铺', '尺寸', '标题', '爬取时间', '清洗价格']
+
+
+def discover_snapshots():
+    """按文件名顺序（即爬取日期顺序）列出 data/ 下所有清洗后的快照"""
+    return sorted(DATA_DIR.glob(SNAPSHOT_PATTERN))
+
+
+def _empty_manifest():
+    return {'schema': SCHEMA_VERSION, 'files': {}, 'parts': []}
+
+
+def load_manifest():
+    if INGEST_MANIFEST.exists():
+        manifest = json.loads(INGEST_MANIFEST.read_text(encoding='utf-8'))
+        if manifest.get('schema') == SCHEMA_VERSION:
+            return manifest
+    return _empty_manifest()
+
+
+def _save_manifest(manifest):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = INGEST_MANIFEST.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    tmp_path.replace(INGEST_MANIFEST)
+
+
+def data_version(manifest=None):
+    """由已入库文件的内容哈希派生的数据版本号，入库内容不变则版本不变"""
+    manifest = manifest or load_manifest()
+    digest = hashlib.sha1(str(manifest['schema']).encode())
+    for name in sorted(manifest['files']):
+        digest.update(f"{name}:{manifest['files'][name]['sha1']}".encode())
+    return digest.hexdigest()[:12]
+
+
+def row_keys(df):
+    """把去重键哈希成 uint64，便于与历史键集合做集合运算"""
+    keys = df[KEY_COLUMNS].astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _load_keys():
+    if KEYS_FILE.exists():
+        return np.load(KEYS_FILE)
+    return np.empty(0, dtype=np.uint64)
+
+
+def _save_keys(keys):
+    HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = KEYS_FILE.with_suffix(f'.{os.getpid()}.tmp.npy')
+    np.save(tmp_path, keys)
+    tmp_path.replace(KEYS_FILE)
+
+
+def _load_applied():
+    if APPLIED_FILE.exists():
+        return json.loads(APPLIED_FILE.read_text(encoding='utf-8'))
+    return {}
+
+
+def _mark_applied(applied, name, parts):
+    applied[name] = parts
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = APPLIED_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps(applied), encoding='utf-8')
+    tmp_path.replace(APPLIED_FILE)
+
+
+@contextmanager
+def _applying(applied, name, parts):
+    """更新期间把派生表标记为未完成，中途失败时下次入库会重建它"""
+    _mark_applied(applied, name, None)
+    yield
+    _mark_applied(applied, name, parts)
+
+
+def _is_ingested(entry, path, stat):
+    if not entry:
+        return False
+    if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+        return True
+    return entry['sha1'] == file_sha1(path)
+
+
+def ingest_file(path, manifest, known_keys, applied):
+    """
+    读取一个快照文件，只把历史中不存在的行追加为新的分片。
+    返回更新后的键集合（已排序）；调用方负责随后保存键集合和清单。
+    """
+    stat = path.stat()
+    df = load_snapshot(path)
+    keys = row_keys(df)
+
+    # 先去掉文件内部的重复行，再与历史键集合比较
+    _, first_idx = np.unique(keys, return_index=True)
+    is_new = np.zeros(len(df), dtype=bool)
+    is_new[first_idx] = True
+    if len(known_keys):
+        pos = np.searchsorted(known_keys, keys).clip(max=len(known_keys) - 1)
+        is_new &= known_keys[pos] != keys
+
+    delta = df[is_new]
+    part_name = None
+    alert_count = 0
+    if len(delta):
+        part_name = f"part-{len(manifest['parts']):05d}.parquet"
+        write_frame(delta, HISTORY_DIR / part_name)
+        manifest['parts'].append(part_name)
+        parts = len(manifest['parts'])
+        # 汇总表和价格告警只处理新增行，无需回读历史；商品表只回读紧凑的价格历史
+        with _applying(applied, 'aggregates', parts):
+            update_aggregates(delta)
+        with _applying(applied, 'alerts', parts):
+            alert_count = update_alerts(delta, part_name)
+        with _applying(applied, 'products', parts):
+            update_products(delta)
+        known_keys = np.union1d(known_keys, keys[is_new])
+
+    manifest['files'][path.name] = {
+        'sha1': file_sha1(path),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'rows_read': len(df),
+        'rows_added': len(delta),
+        'part': part_name,
+        'alerts': alert_count,
+        'ingested_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    return known_keys
+
+
+def ingest_snapshots():
+    """
+    将 data/ 下新增或变化的快照增量写入历史存储，返回当前数据版本号。
+    已入库且未变化的文件只做一次 stat，不会被重新读取。
+    整个过程持有 store_lock，多个进程同时刷新时依次入库，后来者直接得到已入库的结果。
+    """
+    with store_lock():
+        manifest = load_manifest()
+        applied = _load_applied()
+        parts = len(manifest['parts'])
+        if not manifest['files']:
+            # 存储格式升级或清单丢失时，从头重建历史分片和汇总表
+            for path in (HISTORY_DIR, AGGREGATES_DIR, ALERTS_DIR, PRODUCTS_DIR):
+                if path.exists():
+                    shutil.rmtree(path)
+            for name in DERIVED_TABLES:
+                _mark_applied(applied, name, 0)
+        else:
+            # 汇总表、告警或商品表缺失（例如由旧版本生成的存储），或与清单中的分片不一致
+            # （上次入库中途失败）时，由已有历史重建
+            if not aggregates_exist() or applied.get('aggregates') != parts:
+                rebuild_aggregates(load_history())
+                _mark_applied(applied, 'aggregates', parts)
+            if not products_exist() or applied.get('products') != parts:
+                rebuild_products(load_history())
+                _mark_applied(applied, 'products', parts)
+            if not alerts_exist() or applied.get('alerts') != parts:
+                # 告警依赖入库顺序，按分片顺序逐个重放
+                rebuild_alerts((part, read_frame(HISTORY_DIR / part)) for part in manifest['parts'])
+                _mark_applied(applied, 'alerts', parts)
+
+        pending = [
+            path for path in discover_snapshots()
+            if not _is_ingested(manifest['files'].get(path.name), path, path.stat())
+        ]
+        if pending:
+            known_keys = _load_keys()
+            for path in pending:
+                known_keys = ingest_file(path, manifest, known_keys, applied)
+                # 每个文件入库后立即保存键集合和清单，之后的文件失败时重试不会再处理这个文件
+                _save_keys(known_keys)
+                _save_manifest(manifest)
+        return data_version(manifest)
+
+
+def _unify_types(tables):
+    """
+    统一各分片的列类型：分类列的索引宽度统一为 int32，
+    同名列在不同快照中类型不一致时（如“价格”既有数字又有文本）统一为字符串。
+    """
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, set()).add(field.type)
+
+    target = {}
+    for name, seen in types.items():
+        if any(pa.types.is_dictionary(t) for t in seen):
+            target[name] = pa.dictionary(pa.int32(), pa.string())
+        elif len(seen - {pa.null()}) > 1:
+            target[name] = pa.string()
+
+    unified = []
+    for table in tables:
+        schema = pa.schema([
+            field.with_type(target.get(field.name, field.type)) for field in table.schema
+        ], metadata=table.schema.metadata)
+        unified.append(table.cast(schema))
+    return unified
+
+
+def load_history(columns=None):
+    """读取全部历史分片并合并为一个 DataFrame"""
+    manifest = load_manifest()
+    tables = [
+        pq.read_table(HISTORY_DIR / part, columns=columns, memory_map=True)
+        for part in manifest['parts']
+    ]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    # 不同批次的快照列可能不完全一致（如早期文件带有“店铺类型”），缺失列补空
+    table = pa.concat_tables(_unify_types(tables), promote_options='default')
+    return table.to_pandas()
+
+
+def load_store_tables():
+    """
+    读取入库时维护的汇总表、告警和商品表，与 load_history 在同一次入库之后读取，
+    挂在对应版本的数据集上；之后的入库覆盖磁盘文件不影响已加载的版本
+    """
+    return {'aggregates': load_aggregates(), 'alerts': load_alerts(), 'products': load_products()}
+
+
+if __name__ == "__main__":
+    # 手动触发增量入库：python -m utils.ingest
+    version = ingest_snapshots()
+    for name, entry in load_manifest()['files'].items():
+        print(f"{name}: 读取 {entry['rows_read']} 行，新增 {entry['rows_added']} 行，告警 {entry.get('alerts', 0)} 条")
+    print(f"数据版本：{version}")
+
+    # 顺便生成 jieba 词典缓存，看板首次渲染词云时直接从磁盘加载
+    from utils.tokenizer import load_jieba
+    load_jieba()
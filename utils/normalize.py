@@ -0,0 +1,98 @@
+import pandas as pd
+
+# 评论数中的数量单位
+COMMENT_UNITS = {'万': 10_000, '亿': 100_000_000}
+
+# 除厂商/机型/店铺/尺寸外，同样适合分类编码的低基数列
+EXTRA_CATEGORICAL_COLUMNS = ['店铺类型']
+
+
+def parse_comment_counts(series):
+    """
+    将“5万+”“1.5万+”“2,000+”之类的评论数解析为整数，返回 (int32 序列, 解析失败的行掩码)。
+    已经是数值的列直接转换；缺失值按 0 处理，不计为失败。
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype(float)
+        return values.fillna(0).astype('int32'), pd.Series(False, index=series.index)
+
+    text = series.astype('string').str.strip().str.replace(',', '', regex=False)
+    parts = text.str.extract(r'^(?P<number>\d+(?:\.\d+)?)\s*(?P<unit>[万亿]?)\+?$')
+    number = pd.to_numeric(parts['number'], errors='coerce')
+    multiplier = parts['unit'].map(COMMENT_UNITS).fillna(1)
+    values = (number * multiplier).round()
+    failed = values.isna() & text.notna() & (text != '')
+    return values.fillna(0).astype('int32'), failed
+
+
+def parse_prices(series):
+    """价格解析为 float32，“待发布”等无法解析的值记为缺失并计为失败"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float32'), pd.Series(False, index=series.index)
+    text = series.astype('string').str.strip().str.replace(r'[¥￥,\s]', '', regex=True)
+    values = pd.to_numeric(text, errors='coerce')
+    failed = values.isna() & text.notna() & (text != '')
+    return values.astype('float32'), failed
+
+
+def parse_sizes(series):
+    """从“65寸”“65英寸”中提取英寸数，返回 float32（“未知尺寸”等记为缺失）"""
+    text = series.astype('string')
+    values = pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce')
+    failed = values.isna() & text.notna() & (text != '未知尺寸')
+    return values.astype('float32'), failed
+
+
+def normalize_frame(df):
+    """
+    入库前统一数值列的类型，页面不再需要解析原始字符串。
+    爬取时间缺失或无法解析的行无法排入价格历史，直接丢弃并计入爬取时间的失败行数。
+    返回 (规范化后的 DataFrame, {列名: 解析失败行数})。
+    """
+    df = df.copy()
+    failures = {}
+
+    if '爬取时间' in df.columns:
+        df['爬取时间'] = pd.to_datetime(df['爬取时间'], errors='coerce')
+        missing = df['爬取时间'].isna()
+        failures['爬取时间'] = int(missing.sum())
+        df = df[~missing].reset_index(drop=True)
+
+    if '评论数' in df.columns:
+        df['评论数'], failed = parse_comment_counts(df['评论数'])
+        failures['评论数'] = int(failed.sum())
+    elif '评论' in df.columns:
+        df['评论数'], failed = parse_comment_counts(df['评论'])
+        failures['评论数'] = int(failed.sum())
+
+    for column in ['价格', '清洗价格']:
+        if column in df.columns:
+            df[column], failed = parse_prices(df[column])
+            failures[column] = int(failed.sum())
+
+    if '尺寸' in df.columns:
+        df['尺寸数值'], failed = parse_sizes(df['尺寸'])
+        failures['尺寸'] = int(failed.sum())
+
+    for column in EXTRA_CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('string').astype('category')
+
+    return df, {column: count for column, count in failures.items() if count}
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+if __name__ == "__main__":
+    # 对比规范化前后的内存占用：python -m utils.normalize data/20250304-0317已清洗new.xlsx
+    import sys
+    from utils.data_store import to_typed_frame
+
+    raw = pd.read_excel(sys.argv[1])
+    normalized, report = normalize_frame(raw)
+    normalized = to_typed_frame(normalized)
+    print(f"原始：{memory_usage_mb(raw):.2f} MB，规范化后：{memory_usage_mb(normalized):.2f} MB")
+    print(f"解析失败：{report or '无'}")
+    print(normalized.dtypes.to_string())
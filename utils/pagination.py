@@ -0,0 +1,121 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK_ROWS = 50000
+
+
+def page_count(total, page_size):
+    return max((total + page_size - 1) // page_size, 1)
+
+
+def _sort_values(view, sort_key, ascending, key):
+    values = view.column(sort_key)
+    if key is not None:
+        values = key(values)
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        # 时间列按时间戳数值排序，NaT 视为缺失
+        values = np.where(np.isnat(values), np.nan, values.astype('datetime64[ns]').astype(np.int64))
+    elif values.dtype.kind not in 'biuf':
+        return None
+    values = values.astype(float)
+    # 统一成升序取前 k 个，缺失值始终排在最后
+    return values if ascending else -values
+
+
+def page_positions(view, page, page_size, sort_key=None, ascending=True, key=None):
+    """
+    返回第 page 页（从 0 开始）在 view 中的位置。
+    数值列排序时只用 argpartition 选出前 (page + 1) * page_size 个再排序，
+    不对整个结果做完整排序；非数值列退化为完整的稳定排序。
+    """
+    total = len(view)
+    start = page * page_size
+    stop = min(start + page_size, total)
+    if start >= total:
+        return np.empty(0, dtype=np.int64)
+    if sort_key is None:
+        return np.arange(start, stop)
+
+    values = _sort_values(view, sort_key, ascending, key)
+    if values is None:
+        order = np.argsort(view.column(sort_key), kind='stable')
+        return order[::1 if ascending else -1][start:stop]
+
+    values = np.where(np.isnan(values), np.inf, values)
+    if stop < total:
+        # 第 stop 小的值作为分界，与分界值相等的行按原顺序补足，保证排序稳定
+        kth = np.partition(values, stop - 1)[stop - 1]
+        smaller = np.flatnonzero(values < kth)
+        ties = np.flatnonzero(values == kth)[:stop - len(smaller)]
+        top = np.concatenate([smaller, ties])
+    else:
+        top = np.arange(total)
+    top = top[np.lexsort((top, values[top]))]
+    return top[start:stop]
+
+
+def paginate(view, page, page_size, sort_key=None, ascending=True, key=None, columns=None):
+    """
+    只取出指定页的数据，返回 (当前页 DataFrame, 总页数)。
+    sort_key 为排序列，key 可对排序值做变换（例如 np.abs 按绝对值排序）。
+    """
+    positions = page_positions(view, page, page_size, sort_key, ascending, key)
+    rows = view.row_ids[positions]
+    frame = view.df.iloc[rows]
+    if columns is not None:
+        frame = frame[list(columns)]
+    return frame, page_count(len(view), page_size)
+
+
+def iter_csv_chunks(view, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """分块生成 CSV 字节流（带 BOM，便于 Excel 直接打开），同一时间只有一块数据在内存中"""
+    for offset in range(0, max(len(view), 1), chunk_rows):
+        chunk = view.page(offset, chunk_rows, columns)
+        text = chunk.to_csv(index=False, header=offset == 0)
+        yield ('\ufeff' + text if offset == 0 else text).encode('utf-8')
+
+
+def write_csv(view, path, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    with open(path, 'wb') as f:
+        for chunk in iter_csv_chunks(view, columns, chunk_rows):
+            f.write(chunk)
+
+
+def iter_record_batches(view, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """分块转换为 Arrow RecordBatch，各块统一为第一块的 schema，同一时间只有一块数据在内存中"""
+    schema = None
+    for offset in range(0, max(len(view), 1), chunk_rows):
+        table = pa.Table.from_pandas(view.page(offset, chunk_rows, columns), preserve_index=False)
+        if schema is None:
+            schema = table.schema
+        else:
+            table = table.cast(schema)
+        yield from table.to_batches() or [pa.RecordBatch.from_pylist([], schema=schema)]
+
+
+def write_parquet(view, sink, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """按行组分块写出 Parquet，每块单独转换，不缓冲整个结果；sink 可以是路径或可写的文件对象"""
+    writer = None
+    try:
+        for batch in iter_record_batches(view, columns, chunk_rows):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_arrow_stream(view, sink, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """以 Arrow IPC 流格式分块写出，接收方可以边读边处理"""
+    writer = None
+    try:
+        for batch in iter_record_batches(view, columns, chunk_rows):
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
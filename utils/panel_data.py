@@ -0,0 +1,87 @@
+import pandas as pd
+
+from utils.data_store import DATA_DIR, convert_snapshot, read_frame, snapshot_sha1, store_lock
+
+PANEL_FILE = DATA_DIR / "AVC-全球TV面板价格月度数据报告.xlsx"
+
+# 每行面板的描述列，其余列为按月份排列的价格
+DESCRIPTOR_COLUMNS = ['Company', 'Size', 'Resolution', 'Refresh Rate', 'Remark', 'Price']
+LONG_COLUMNS = ['Sheet', 'Company', 'Size', 'Resolution', 'Refresh Rate', 'Remark', 'Period', 'Forecast', 'Value']
+
+
+def parse_period(column):
+    """
+    把月份列名解析为 (当月第一天, 是否为预测值)，无法解析时返回 None。
+    列名形如 21.11（数字）、22.1（即 22.10，被 Excel 读成数字）或 '25.01F'（预测值）。
+    """
+    forecast = False
+    if isinstance(column, str):
+        forecast = column.endswith('F')
+        try:
+            column = float(column.rstrip('F'))
+        except ValueError:
+            return None
+    if not isinstance(column, (int, float)):
+        return None
+    year = int(column)
+    month = round((column - year) * 100)
+    if not 1 <= month <= 12:
+        return None
+    return pd.Timestamp(year=2000 + year, month=month, day=1), forecast
+
+
+def sheet_to_long(df, sheet_name):
+    """把一个工作表由“每月一列”的宽表转换为每行一个 (面板, 月份) 的长表"""
+    df = df.dropna(subset=['Company', 'Size']).copy()
+    descriptors = [c for c in DESCRIPTOR_COLUMNS if c in df.columns]
+    df[descriptors] = df[descriptors].ffill()
+
+    periods = {column: parse_period(column) for column in df.columns if column not in descriptors}
+    periods = {column: parsed for column, parsed in periods.items() if parsed is not None}
+
+    long = df.melt(id_vars=descriptors, value_vars=list(periods), var_name='column', value_name='Value')
+    long['Period'] = long['column'].map(lambda c: periods[c][0])
+    long['Forecast'] = long['column'].map(lambda c: periods[c][1])
+    long['Value'] = pd.to_numeric(long['Value'], errors='coerce').astype('float32')
+    long['Sheet'] = sheet_name
+    return long.drop(columns='column').dropna(subset=['Value'])
+
+
+def read_panel_workbook(source):
+    """读取 AVC 工作簿的全部工作表并合并为长表，返回 (DataFrame, 解析失败统计)"""
+    sheets = pd.read_excel(source, sheet_name=None)
+    long = pd.concat([sheet_to_long(df, name) for name, df in sheets.items()], ignore_index=True)
+    for column in ['Sheet', 'Company', 'Resolution', 'Refresh Rate', 'Remark', 'Price']:
+        if column in long.columns:
+            long[column] = long[column].astype('string').astype('category')
+    long['Size'] = long['Size'].astype('float32')
+    long = long.reindex(columns=[c for c in LONG_COLUMNS if c in long.columns])
+    # 按 (工作表, 厂商, 尺寸, 月份) 排序，图表切片时各组数据连续
+    long = long.sort_values(['Sheet', 'Company', 'Size', 'Period'], kind='stable').reset_index(drop=True)
+    return long, {}
+
+
+def load_panel_prices(source=PANEL_FILE):
+    """面板价格长表，工作簿只在内容变化时重新解析"""
+    # 转换会改写快照清单，与入库一样在 store_lock 内进行，避免与其它进程互相覆盖清单
+    with store_lock():
+        return read_frame(convert_snapshot(source, reader=read_panel_workbook))
+
+
+def panel_version(source=PANEL_FILE):
+    """面板工作簿的版本（内容哈希前 12 位），必要时先完成转换；用作面板派生结果的缓存键"""
+    with store_lock():
+        convert_snapshot(source, reader=read_panel_workbook)
+        return snapshot_sha1(source)[:12]
+
+
+def company_trend(long, sheet, companies=None, start=None, end=None):
+    """某个工作表中各厂商每月的平均面板价格：列为 Company、Period、Value"""
+    mask = long['Sheet'] == sheet
+    if companies:
+        mask &= long['Company'].isin(companies)
+    if start is not None:
+        mask &= long['Period'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= long['Period'] <= pd.Timestamp(end)
+    return long[mask].groupby(['Company', 'Period'], observed=True)['Value'].mean().reset_index()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from utils.panel_data import load_panel_prices
+
+# 面板价格按月发布，零售日期向前匹配最近一个月的面板价格，超过该间隔视为无对应面板价格
+MAX_PANEL_GAP = pd.Timedelta(days=62)
+
+JOINED_COLUMNS = ['日期', '尺寸数值', '零售均价', '零售中位价', '商品数', '面板月份', '面板价格', '面板预测值']
+
+
+def panel_monthly(long, sheet='Average', include_forecast=True):
+    """
+    每个 (尺寸, 月份) 的平均面板价格：列为 尺寸数值、面板月份、面板价格、面板预测值，按月份排序。
+    报告中最近几个月只有预测值，默认保留并用 面板预测值 标记。
+    """
+    mask = long['Sheet'] == sheet
+    if not include_forecast:
+        mask &= ~long['Forecast']
+    monthly = long[mask].groupby(['Size', 'Period'], observed=True).agg(
+        面板价格=('Value', 'mean'), 面板预测值=('Forecast', 'any')
+    ).reset_index()
+    monthly = monthly.rename(columns={'Size': '尺寸数值', 'Period': '面板月份'})
+    monthly['尺寸数值'] = monthly['尺寸数值'].astype('float32')
+    return monthly.sort_values('面板月份', kind='stable').reset_index(drop=True)
+
+
+def retail_daily(df):
+    """每个 (尺寸, 日期) 的零售价格汇总：列为 日期、尺寸数值、零售均价、零售中位价、商品数"""
+    frame = pd.DataFrame({
+        '日期': df['爬取时间'].dt.normalize(),
+        '尺寸数值': df['尺寸数值'].astype('float32'),
+        '清洗价格': df['清洗价格'].astype(float),
+    }).dropna()
+    daily = frame.groupby(['尺寸数值', '日期'])['清洗价格'].agg(
+        零售均价='mean', 零售中位价='median', 商品数='size'
+    ).reset_index()
+    return daily[['日期', '尺寸数值', '零售均价', '零售中位价', '商品数']]
+
+
+def join_panel_retail(retail, panel, max_gap=MAX_PANEL_GAP):
+    """
+    零售日汇总与月度面板价格按尺寸做 as-of 连接：每个零售日期匹配同尺寸最近一个
+    不晚于它的面板月份。两边都先排好序，一次 merge_asof 完成，不逐行查找。
+    """
+    retail = retail.sort_values('日期', kind='stable')
+    joined = pd.merge_asof(
+        retail, panel.sort_values('面板月份', kind='stable'),
+        left_on='日期', right_on='面板月份', by='尺寸数值',
+        direction='backward', tolerance=max_gap,
+    )
+    return joined.sort_values(['尺寸数值', '日期'], kind='stable').reset_index(drop=True)[JOINED_COLUMNS]
+
+
+def build_panel_retail(df, sheet='Average'):
+    """由零售明细和面板价格工作簿构建连接表，按数据版本缓存在 Dataset.derived 中"""
+    return join_panel_retail(retail_daily(df), panel_monthly(load_panel_prices(), sheet))
+
+
+def _wide(joined, value_column, freq=None):
+    """连接表转为 日期 × 尺寸 的宽表；freq 为 'MS' 时先按月取均值"""
+    frame = joined.dropna(subset=['面板价格'])
+    index = frame['日期'] if freq is None else frame['日期'].dt.to_period('M').dt.start_time
+    return frame.pivot_table(index=index, columns='尺寸数值', values=value_column, aggfunc='mean').sort_index()
+
+
+def rolling_correlation(joined, window=30, min_periods=10, value_column='零售均价'):
+    """
+    各尺寸零售价格与面板价格在 window 天滑动窗口内的相关系数，所有尺寸一次计算。
+    返回 日期 × 尺寸 的宽表。
+    """
+    retail = _wide(joined, value_column)
+    panel = _wide(joined, '面板价格').reindex_like(retail)
+    # 日期按天对齐，缺失的日期不参与窗口内的计算
+    retail = retail.asfreq('D')
+    panel = panel.asfreq('D')
+    # 窗口内面板价格不变（方差为 0）时相关系数无意义，结果记为缺失
+    return retail.rolling(window, min_periods=min_periods).corr(panel).replace([np.inf, -np.inf], np.nan)
+
+
+def lag_correlation(joined, panel, max_lag=6, value_column='零售均价'):
+    """
+    按月对齐后，面板价格领先零售价格 0..max_lag 个月时的相关系数。
+    面板价格取自完整的月度表（panel_monthly），零售数据之前的月份也能参与平移；
+    每个滞后只做一次整表平移，所有尺寸同时计算。返回 滞后月数 × 尺寸 的宽表。
+    """
+    retail = _wide(joined, value_column, freq='MS').asfreq('MS')
+    panel = panel.pivot_table(index='面板月份', columns='尺寸数值', values='面板价格').asfreq('MS')
+    panel = panel.reindex(columns=retail.columns)
+    lags = {lag: retail.corrwith(panel.shift(lag).reindex(retail.index)) for lag in range(max_lag + 1)}
+    result = pd.DataFrame(lags).T
+    result.index.name = '滞后月数'
+    return result
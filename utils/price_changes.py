@@ -0,0 +1,20 @@
+import numpy as np
+
+from utils.query_engine import LazyView
+
+
+def select_price_changes(changes, manufacturer=None, model=None, stores=None, sizes=None):
+    """
+    在 ProductIndex.price_changes 的结果上筛选，返回 LazyView（只计算命中的行号，不复制表格）。
+    model 为机型子串，stores、sizes 为取值列表，为空的条件会被忽略。
+    """
+    mask = np.ones(len(changes), dtype=bool)
+    if manufacturer:
+        mask &= (changes['厂商'] == manufacturer).to_numpy()
+    if model:
+        mask &= changes['机型'].astype(str).str.contains(model, regex=False).to_numpy()
+    if stores:
+        mask &= changes['店铺'].isin(stores).to_numpy()
+    if sizes:
+        mask &= changes['尺寸'].isin(sizes).to_numpy()
+    return LazyView(changes, np.flatnonzero(mask))
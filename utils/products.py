@@ -0,0 +1,283 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import STORE_DIR, read_frame, write_frame
+
+PRODUCTS_DIR = STORE_DIR / "products"
+
+# 爬虫无法识别型号时统一填写的机型，其下混有不同商品，价格不可比
+GENERIC_MODEL = '通用型号'
+
+# 商品：同一厂商、机型、尺寸；链接：某个商品在某个店铺的在售链接。
+# 链接按商品细分，同一机型在数据中对应多个尺寸（或“通用型号”）时不会被混为一条。
+PRODUCT_COLUMNS = ['厂商', '机型', '尺寸']
+LISTING_COLUMNS = ['商品ID', '店铺']
+HISTORY_COLUMNS = ['链接ID', '爬取时间', '清洗价格', '评论数', '入库序号']
+
+# products:  商品ID（即行号）-> 厂商, 机型, 尺寸, 通用型号
+# listings:  链接ID（即行号）-> 商品ID, 店铺
+# histories: 按 (链接ID, 爬取时间) 排序的价格和评论数，每条链接的历史是一段连续的行；
+#            入库序号按入库顺序递增，同一时刻的多条记录按它保持入库时的先后
+# 编号在入库时按首次出现的顺序分配，之后不再变化；新增行只追加新编号并归并到历史中
+TABLES = ('products', 'listings', 'histories')
+
+
+def _empty_tables():
+    return {
+        'products': pd.DataFrame({
+            '厂商': pd.Series(dtype='string'), '机型': pd.Series(dtype='string'),
+            '尺寸': pd.Series(dtype='string'), '通用型号': pd.Series(dtype='bool'),
+        }),
+        'listings': pd.DataFrame({'商品ID': pd.Series(dtype='int32'), '店铺': pd.Series(dtype='string')}),
+        'histories': pd.DataFrame({
+            '链接ID': pd.Series(dtype='int32'), '爬取时间': pd.Series(dtype='datetime64[ns]'),
+            '清洗价格': pd.Series(dtype='float64'), '评论数': pd.Series(dtype='float64'),
+            '入库序号': pd.Series(dtype='int64'),
+        }),
+    }
+
+
+def _assign_ids(table, keys):
+    """
+    在 table（行号即编号）中查找 keys 每一行的编号，未出现过的键按首次出现的顺序追加到 table 末尾。
+    返回 (追加后的 table, 每行的编号)。
+    """
+    columns = list(keys.columns)
+    # 先在新增行内部按分类编码分组去重，只有去重后的少量键需要与 table 比较
+    groups = keys.groupby(columns, sort=False, observed=True).ngroup().to_numpy()
+    first_rows = np.unique(groups, return_index=True)[1]
+    unique_keys = keys.iloc[first_rows].astype(table.dtypes[columns].to_dict()).reset_index(drop=True)
+    ids = pd.MultiIndex.from_frame(table[columns]).get_indexer(pd.MultiIndex.from_frame(unique_keys))
+    is_new = ids < 0
+    if is_new.any():
+        new_groups = np.flatnonzero(is_new)[np.argsort(first_rows[is_new], kind='stable')]
+        ids[new_groups] = len(table) + np.arange(len(new_groups))
+        table = pd.concat([table, unique_keys.iloc[new_groups]], ignore_index=True)
+    return table, ids[groups].astype('int32')
+
+
+def _time_key(times):
+    """排序用的时间值（纳秒整数）；爬取时间缺失的行在入库规范化时已丢弃"""
+    return np.asarray(times, dtype='datetime64[ns]').astype(np.int64)
+
+
+def _merge_history(old, new):
+    """
+    把新增记录归并进按 (链接ID, 爬取时间, 入库序号) 排好序的历史。
+    新增记录通常晚于同一链接已有的记录，只有晚于某链接最早一条新增记录的旧记录
+    （重叠或迟到的爬取批次）需要和新增记录一起重新排序，其余旧记录保持原有顺序。
+    """
+    old_links = old['链接ID'].to_numpy()
+    new_links = new['链接ID'].to_numpy()
+    first_new = np.full(max(old_links.max(initial=-1), new_links.max(initial=-1)) + 1, np.iinfo(np.int64).max)
+    np.minimum.at(first_new, new_links, _time_key(new['爬取时间']))
+    in_block = _time_key(old['爬取时间']) > first_new[old_links]
+    block = pd.concat([old[in_block], new], ignore_index=True)
+    block = block.iloc[np.lexsort((block['入库序号'].to_numpy(), _time_key(block['爬取时间']),
+                                   block['链接ID'].to_numpy()))]
+    rest = old[~in_block]
+    # 同一链接中，留在原位的旧记录都早于重新排序的部分，后者插到该链接旧记录之后
+    positions = np.searchsorted(old_links[~in_block], block['链接ID'].to_numpy(), side='right')
+    positions += np.arange(len(block))
+    order = np.empty(len(rest) + len(block), dtype=np.int64)
+    is_block = np.zeros(len(order), dtype=bool)
+    is_block[positions] = True
+    order[is_block] = len(rest) + np.arange(len(block))
+    order[~is_block] = np.arange(len(rest))
+    return pd.concat([rest, block], ignore_index=True).iloc[order].reset_index(drop=True)
+
+
+def merge_products(tables, delta):
+    """把一批新增明细并入三张表；历史按 (链接ID, 爬取时间, 入库序号) 排序"""
+    old_history = tables['histories']
+    first_seq = int(old_history['入库序号'].max()) + 1 if len(old_history) else 0
+    sequence = first_seq + np.arange(len(delta), dtype=np.int64)
+    # 键列缺失的行无法归属到商品或链接，没有爬取时间的行无法排入历史
+    has_keys = delta[PRODUCT_COLUMNS + ['店铺', '爬取时间']].notna().all(axis=1).to_numpy()
+    rows, sequence = delta[has_keys], sequence[has_keys]
+    products, product_ids = _assign_ids(tables['products'][PRODUCT_COLUMNS], rows[PRODUCT_COLUMNS])
+    products['通用型号'] = (products['机型'] == GENERIC_MODEL).to_numpy()
+
+    listing_keys = pd.DataFrame({'商品ID': product_ids, '店铺': rows['店铺'].to_numpy()})
+    listings, listing_ids = _assign_ids(tables['listings'], listing_keys)
+    listings['商品ID'] = listings['商品ID'].astype('int32')
+
+    history = pd.DataFrame({
+        '链接ID': listing_ids,
+        '爬取时间': rows['爬取时间'].to_numpy(),
+        '清洗价格': rows['清洗价格'].astype(float).to_numpy(),
+        '评论数': rows['评论数'].astype(float).to_numpy() if '评论数' in rows.columns else np.nan,
+        '入库序号': sequence,
+    })
+    return {'products': products, 'listings': listings, 'histories': _merge_history(old_history, history)}
+
+
+def build_products(df):
+    """由明细直接建立三张表"""
+    return merge_products(_empty_tables(), df)
+
+
+def products_exist():
+    return all((PRODUCTS_DIR / f"{name}.parquet").exists() for name in TABLES)
+
+
+def load_products():
+    return {name: read_frame(PRODUCTS_DIR / f"{name}.parquet") for name in TABLES}
+
+
+def save_products(tables):
+    for name in TABLES:
+        write_frame(tables[name], PRODUCTS_DIR / f"{name}.parquet")
+
+
+def update_products(delta):
+    """入库时调用：为新增行分配商品和链接编号，并把价格记录归并进各链接的历史"""
+    tables = load_products() if products_exist() else _empty_tables()
+    save_products(merge_products(tables, delta))
+
+
+def rebuild_products(df):
+    """由全部明细重建商品表（存储格式升级或商品表缺失时使用）"""
+    if PRODUCTS_DIR.exists():
+        shutil.rmtree(PRODUCTS_DIR)
+    save_products(build_products(df))
+
+
+class ProductIndex:
+    """
+    商品、链接与各链接价格历史的只读索引。
+
+    histories 已按链接排序，链接 i 的历史是 offsets[i]:offsets[i + 1] 一段；
+    链接按商品分组后同样用一段偏移表示，商品数、单个商品的历史、跨店铺比价都只做切片。
+    """
+
+    def __init__(self, tables):
+        self.products = tables['products']
+        self.listings = tables['listings']
+        self.history = tables['histories']
+
+        listing_of_row = self.history['链接ID'].to_numpy()
+        self.offsets = np.searchsorted(listing_of_row, np.arange(len(self.listings) + 1))
+        product_of_listing = self.listings['商品ID'].to_numpy()
+        self._listing_order = np.argsort(product_of_listing, kind='stable').astype(np.int32)
+        self._listing_bounds = np.searchsorted(product_of_listing[self._listing_order],
+                                               np.arange(len(self.products) + 1))
+        self._lookup = {key: i for i, key in
+                        enumerate(self.products[PRODUCT_COLUMNS].itertuples(index=False, name=None))}
+
+        # 每条链接的最新一次和前一次记录（没有时为 -1）
+        counts = np.diff(self.offsets)
+        self.latest_row = np.where(counts > 0, self.offsets[1:] - 1, -1)
+        self.previous_row = np.where(counts > 1, self.offsets[1:] - 2, -1)
+
+        generic = self.products['通用型号'].to_numpy(dtype=bool)
+        self._counts = self.products[~generic].groupby('厂商', observed=True).size()
+
+    def product_count(self, manufacturer=None):
+        """商品数（不含“通用型号”），可按厂商统计"""
+        if manufacturer is None:
+            return int(self._counts.sum())
+        return int(self._counts.get(manufacturer, 0))
+
+    def listing_count(self):
+        return len(self.listings)
+
+    def find(self, manufacturer, model, size):
+        """(厂商, 机型, 尺寸) 对应的商品ID，不存在时返回 None"""
+        return self._lookup.get((manufacturer, model, size))
+
+    def product_listings(self, product_id):
+        """某商品的所有链接ID"""
+        return self._listing_order[self._listing_bounds[product_id]:self._listing_bounds[product_id + 1]]
+
+    def listing_history(self, listing_id):
+        """某条链接按时间排序的价格历史"""
+        return self.history.iloc[self.offsets[listing_id]:self.offsets[listing_id + 1]]
+
+    def product_history(self, product_id):
+        """某商品在各店铺的价格历史，每个店铺内按时间排序"""
+        listing_ids = self.product_listings(product_id)
+        parts = [self.listing_history(i) for i in listing_ids]
+        if not parts:
+            return self.history.iloc[0:0].assign(店铺=pd.Series(dtype='string'))
+        history = pd.concat(parts)
+        stores = self.listings['店铺'].to_numpy()[listing_ids]
+        return history.assign(店铺=np.repeat(stores, np.diff(self.offsets)[listing_ids]))
+
+    def store_prices(self, product_id):
+        """某商品在各店铺的最新价格，用于跨店铺比价，按价格升序"""
+        listing_ids = self.product_listings(product_id)
+        rows = self.latest_row[listing_ids]
+        listing_ids, rows = listing_ids[rows >= 0], rows[rows >= 0]
+        return pd.DataFrame({
+            '店铺': self.listings['店铺'].to_numpy()[listing_ids],
+            '最新价格': self.history['清洗价格'].to_numpy()[rows],
+            '爬取时间': self.history['爬取时间'].to_numpy()[rows],
+        }).sort_values('最新价格', kind='stable').reset_index(drop=True)
+
+    def product_summary(self):
+        """
+        每个商品一行（不含“通用型号”）：厂商、机型、尺寸、店铺数、最低价、最高价，
+        价格取各店铺链接的最新价格。
+        """
+        has_latest = self.latest_row >= 0
+        latest = pd.DataFrame({
+            '商品ID': self.listings['商品ID'].to_numpy()[has_latest],
+            '最新价格': self.history['清洗价格'].to_numpy()[self.latest_row[has_latest]],
+        })
+        summary = latest.groupby('商品ID').agg(店铺数=('最新价格', 'size'),
+                                               最低价=('最新价格', 'min'), 最高价=('最新价格', 'max'))
+        products = self.products[~self.products['通用型号']].drop(columns='通用型号')
+        return products.join(summary, how='left').rename_axis('商品ID').reset_index()
+
+    def price_changes(self):
+        """
+        每条链接的最新价格与前一次价格的差异（不含“通用型号”），直接由各链接历史的最后两行得到。
+        列为：厂商、机型、店铺、尺寸、最新价格、前次价格、价格变化、变化幅度、变化日期；
+        只有一次记录的链接视为没有变化。
+        """
+        listing_ids = np.flatnonzero(self.latest_row >= 0)
+        product_ids = self.listings['商品ID'].to_numpy()[listing_ids]
+        keep = ~self.products['通用型号'].to_numpy(dtype=bool)[product_ids]
+        listing_ids, product_ids = listing_ids[keep], product_ids[keep]
+
+        prices = self.history['清洗价格'].to_numpy()
+        times = self.history['爬取时间'].to_numpy()
+        latest_rows = self.latest_row[listing_ids]
+        previous_rows = self.previous_row[listing_ids]
+        latest_price = prices[latest_rows]
+        previous_price = np.where(previous_rows >= 0, prices[previous_rows], np.nan)
+        change = np.where(np.isnan(previous_price), 0.0, latest_price - previous_price)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_change = np.where(previous_price > 0, change / previous_price * 100, 0.0)
+
+        products = self.products.iloc[product_ids]
+        result = pd.DataFrame({
+            '厂商': products['厂商'].to_numpy(),
+            '机型': products['机型'].to_numpy(),
+            '店铺': self.listings['店铺'].to_numpy()[listing_ids],
+            '尺寸': products['尺寸'].to_numpy(),
+            '最新价格': latest_price,
+            '前次价格': previous_price,
+            '价格变化': change,
+            '变化幅度': pct_change,
+            '变化日期': times[latest_rows],
+        })
+        # 按最新一次记录的爬取时间、入库顺序排列
+        order = np.lexsort((self.history['入库序号'].to_numpy()[latest_rows], _time_key(result['变化日期'])))
+        result = result.iloc[order].reset_index(drop=True)
+        for column in ['厂商', '机型', '店铺', '尺寸']:
+            result[column] = result[column].astype('category')
+        return result
+
+
+def product_index(dataset):
+    """数据集对应的商品索引，按数据版本缓存"""
+    return dataset.derived('products', lambda df: ProductIndex(dataset.tables['products']))
+
+
+def dataset_price_changes(dataset):
+    """数据集所有链接的价格变化，由商品索引得到，按数据版本缓存"""
+    return dataset.derived('price_changes', lambda df: product_index(dataset).price_changes())
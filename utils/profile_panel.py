@@ -0,0 +1,62 @@
+import functools
+
+import pandas as pd
+import streamlit as st
+from utils import profiling
+
+# 性能分析开关在 session_state 中的键，片段单独重跑时据此判断是否记录
+PROFILE_KEY = 'profile_enabled'
+
+
+def profile_toggle():
+    """侧边栏的性能分析开关，默认值取自环境变量 DASHBOARD_PROFILE"""
+    return st.sidebar.toggle("性能分析", value=profiling.enabled_by_env(), key=PROFILE_KEY,
+                             help="记录本次运行各区块的耗时、缓存命中和内存，并写入 data/store/logs/profile.log")
+
+
+def profiled_fragment(name):
+    """
+    把页面区块声明为 st.fragment：区块内的控件只触发该区块重跑。
+    整页重跑时作为一个区块计时；开启性能分析后片段单独重跑时，单独记录一次并在区块末尾显示耗时。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            profile = profiling.current()
+            if profile is not profiling.NULL_PROFILE:
+                with profile.section(name):
+                    return func(*args, **kwargs)
+            if not st.session_state.get(PROFILE_KEY):
+                return func(*args, **kwargs)
+            profile = profiling.start(name)
+            try:
+                func(*args, **kwargs)
+            finally:
+                profiling.stop()
+            st.caption(f"⏱ {name} 片段重跑 {profile.total_ms:,.0f} ms")
+        return st.fragment(run)
+    return decorator
+
+
+def show_profile_panel(profile):
+    """展示本次重跑的耗时分解"""
+    with st.expander(f"⏱ 本次运行耗时 {profile.total_ms:,.0f} ms", expanded=True):
+        startup = profiling.startup()
+        if startup:
+            st.caption(f"进程首次渲染（{startup['page']}，含模块导入和数据加载）耗时 {startup['seconds']:.2f} s")
+        if profile.sections:
+            sections = pd.DataFrame(profile.sections)
+            # 按执行顺序展示，子区块缩进显示
+            sections['区块'] = ['　' * level + path.split('/')[-1]
+                              for level, path in zip(sections['层级'], sections['区块'])]
+            sections = sections.drop(columns='层级')
+            st.dataframe(sections, hide_index=True, use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("缓存")
+            if profile.cache_events:
+                st.dataframe(pd.DataFrame(profile.cache_events), hide_index=True, use_container_width=True)
+        with col2:
+            st.caption("数据规模")
+            if profile.frames:
+                st.dataframe(pd.DataFrame(profile.frames), hide_index=True, use_container_width=True)
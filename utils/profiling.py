@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+from utils.data_store import STORE_DIR
+
+# 设置 DASHBOARD_PROFILE=1 时默认开启性能分析，也可在侧边栏临时开启
+ENV_VAR = 'DASHBOARD_PROFILE'
+
+LOG_DIR = STORE_DIR / "logs"
+LOG_FILE = LOG_DIR / "profile.log"
+# 每个日志文件最大 5 MB，保留 3 个历史文件
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_local = threading.local()
+_logger = None
+_logger_lock = threading.Lock()
+_startup = None
+
+
+def enabled_by_env():
+    return os.environ.get(ENV_VAR, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def rss_mb():
+    """当前进程的常驻内存（MB），无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Profile:
+    """
+    一次页面重跑的性能记录：各区块耗时与内存变化、缓存命中情况、DataFrame 规模。
+    区块可以嵌套，名称以“/”连接。
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.started_at = time.time()
+        self.sections = []
+        self.cache_events = []
+        self.frames = []
+        self.total_ms = None
+        self._stack = []
+        self._pending_misses = set()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def section(self, name):
+        # 进入时就登记，保证展示顺序与执行顺序一致（父区块在子区块之前）
+        entry = {'区块': '/'.join(self._stack + [name]), '层级': len(self._stack)}
+        self.sections.append(entry)
+        self._stack.append(name)
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            rss_after = rss_mb()
+            self._stack.pop()
+            entry['耗时(ms)'] = round((time.perf_counter() - start) * 1000, 2)
+            entry['内存(MB)'] = None if rss_after is None else round(rss_after, 1)
+            entry['内存变化(MB)'] = (None if rss_before is None or rss_after is None
+                                  else round(rss_after - rss_before, 1))
+
+    def cache_event(self, name, hit, elapsed_ms=None):
+        self.cache_events.append({
+            '缓存': name, '命中': hit,
+            '耗时(ms)': None if elapsed_ms is None else round(elapsed_ms, 2),
+        })
+
+    @contextmanager
+    def cache(self, name):
+        """
+        包裹一次 st.cache_data 函数调用：函数体内调用 cache_miss(name) 表示未命中，
+        否则视为命中。
+        """
+        self._pending_misses.discard(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            missed = name in self._pending_misses
+            self._pending_misses.discard(name)
+            self.cache_event(name, not missed, (time.perf_counter() - start) * 1000)
+
+    def cache_miss(self, name):
+        self._pending_misses.add(name)
+
+    def record_frame(self, name, df):
+        self.frames.append({
+            '数据': name,
+            '行数': len(df),
+            '列数': df.shape[1] if getattr(df, 'ndim', 1) > 1 else 1,
+            '内存(MB)': round(df.memory_usage(deep=False).sum() / 1024 / 1024, 2)
+                       if hasattr(df, 'memory_usage') else None,
+        })
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        return self
+
+    def to_record(self):
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'page': self.page,
+            'total_ms': self.total_ms,
+            'rss_mb': rss_mb(),
+            'sections': self.sections,
+            'cache': self.cache_events,
+            'frames': self.frames,
+        }
+
+
+class _NullProfile:
+    """未开启性能分析时使用，所有记录操作都是空操作"""
+
+    def section(self, name):
+        return nullcontext()
+
+    def cache(self, name):
+        return nullcontext()
+
+    def cache_event(self, name, hit, elapsed_ms=None):
+        pass
+
+    def cache_miss(self, name):
+        pass
+
+    def record_frame(self, name, df):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
+
+
+def current():
+    """当前线程（即当前会话的这次重跑）正在记录的 Profile，未开启时返回空操作对象"""
+    return getattr(_local, 'profile', None) or NULL_PROFILE
+
+
+def start(page):
+    profile = Profile(page)
+    _local.profile = profile
+    return profile
+
+
+def stop():
+    """结束当前记录并写入滚动日志，返回该 Profile"""
+    profile = getattr(_local, 'profile', None)
+    _local.profile = None
+    if profile is None:
+        return None
+    profile.finish()
+    _get_logger().info(json.dumps(profile.to_record(), ensure_ascii=False))
+    return profile
+
+
+def record_startup(page, seconds):
+    """记录进程内第一次完整渲染的耗时（含模块导入和数据加载）并写入日志，之后的调用直接返回"""
+    global _startup
+    if _startup is None:
+        _startup = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'page': page,
+            'seconds': round(seconds, 3),
+            'rss_mb': rss_mb(),
+        }
+        _get_logger().info(json.dumps({'startup': _startup}, ensure_ascii=False))
+    return _startup
+
+
+def startup():
+    return _startup
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            logger = logging.getLogger('dashboard.profile')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def load_log(path=LOG_FILE):
+    """读取日志中的全部记录（每行一个 JSON），供离线分析"""
+    records = []
+    for file in sorted(path.parent.glob(path.name + '*'), reverse=True):
+        with open(file, encoding='utf-8') as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+if __name__ == "__main__":
+    # 汇总日志中各区块的耗时：python -m utils.profiling
+    import pandas as pd
+
+    records = load_log()
+    startups = [record['startup'] for record in records if 'startup' in record]
+    rows = [
+        {'page': record['page'], **section}
+        for record in records for section in record.get('sections', [])
+    ]
+    if startups:
+        print("首次渲染耗时（秒）：")
+        print(pd.DataFrame(startups).groupby('page')['seconds'].describe()[['count', 'mean', 'min', 'max']].round(2))
+    if not rows:
+        print("暂无性能日志")
+    else:
+        summary = pd.DataFrame(rows).groupby(['page', '区块'])['耗时(ms)'].describe(percentiles=[0.5, 0.95])
+        print(summary[['count', 'mean', '50%', '95%', 'max']].round(1).to_string())
@@ -0,0 +1,172 @@
+"""
+不经过 Streamlit 的查询接口，筛选逻辑与“数据查询”页、价格变化逻辑与“数据概览”页一致，
+索引和价格变化都取自同一份按数据版本缓存的派生结果。
+
+查询是一个字典，例如：
+
+    {'kind': 'listings', 'filters': {'厂商': ['小米'], '尺寸': ['65寸']},
+     'price_range': [2000, 8000], 'search': '小米 65英寸',
+     'columns': ['机型', '店铺', '清洗价格', '爬取时间'],
+     'sort': '清洗价格', 'ascending': True, 'offset': 0, 'limit': 1000}
+
+    {'kind': 'price_changes', 'manufacturer': '小米', 'model': 'Redmi',
+     'stores': [], 'sizes': ['65寸'], 'limit': 10}
+
+    {'kind': 'products', 'manufacturer': '小米', 'sizes': ['65寸']}
+
+price_changes 默认按价格变化绝对值降序，与概览页的表格相同。
+products 每个商品（厂商+机型+尺寸，不含“通用型号”）一行，附各店铺最新价格的店铺数、最低价、最高价。
+"""
+import numpy as np
+import pandas as pd
+
+from utils.dataset_registry import registry
+from utils.pagination import page_positions
+from utils.price_changes import select_price_changes
+from utils.products import dataset_price_changes, product_index
+from utils.query_engine import FILTER_COLUMNS, FilterIndex, LazyView
+from utils.search_index import build_search_index
+
+QUERY_KINDS = ('listings', 'price_changes', 'products')
+QUERY_KEYS = {
+    'listings': {'filters', 'price_range', 'search'},
+    'price_changes': {'manufacturer', 'model', 'stores', 'sizes'},
+    'products': {'manufacturer', 'model', 'sizes'},
+}
+COMMON_KEYS = {'kind', 'columns', 'sort', 'ascending', 'offset', 'limit', 'abs'}
+# 各参数应有的类型，值为 None 表示不传
+LIST_KEYS = ('columns', 'stores', 'sizes')
+STRING_KEYS = ('kind', 'sort', 'search', 'manufacturer', 'model')
+BOOL_KEYS = ('ascending', 'abs')
+
+
+def select_listings(dataset, filters=None, price_range=None, search=None):
+    """
+    按维度取值、价格区间和标题关键词筛选明细，返回 LazyView。
+    filters 的键为 FILTER_COLUMNS 中的列，取值为空的条件会被忽略。
+    """
+    filter_index = dataset.derived('filter_index', FilterIndex)
+    search_rows = None
+    if search:
+        search_rows = dataset.derived('search_index', build_search_index).search(search)
+    return filter_index.select(filters, price_range=price_range, row_ids=search_rows)
+
+
+def select_products(dataset, manufacturer=None, model=None, sizes=None):
+    """按厂商、机型子串和尺寸筛选商品汇总表，返回 LazyView"""
+    summary = dataset.derived('product_summary', lambda df: product_index(dataset).product_summary())
+    mask = np.ones(len(summary), dtype=bool)
+    if manufacturer:
+        mask &= (summary['厂商'] == manufacturer).to_numpy()
+    if model:
+        mask &= summary['机型'].str.contains(model, regex=False).to_numpy(dtype=bool)
+    if sizes:
+        mask &= summary['尺寸'].isin(sizes).to_numpy()
+    return LazyView(summary, np.flatnonzero(mask))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_query(query):
+    if not isinstance(query, dict):
+        raise ValueError("查询应为对象（字典）")
+    kind = query.get('kind', 'listings')
+    if kind not in QUERY_KINDS:
+        raise ValueError(f"未知的查询类型：{kind}，可选 {', '.join(QUERY_KINDS)}")
+    unknown = set(query) - COMMON_KEYS - QUERY_KEYS[kind]
+    if unknown:
+        raise ValueError(f"{kind} 查询不支持的参数：{', '.join(sorted(unknown))}")
+    for key in LIST_KEYS:
+        if query.get(key) is not None and not isinstance(query[key], (list, tuple)):
+            raise ValueError(f"{key} 应为列表")
+    for key in STRING_KEYS:
+        if query.get(key) is not None and not isinstance(query[key], str):
+            raise ValueError(f"{key} 应为字符串")
+    for key in BOOL_KEYS:
+        if query.get(key) is not None and not isinstance(query[key], bool):
+            raise ValueError(f"{key} 应为 true 或 false")
+    filters = query.get('filters')
+    if filters is not None and not isinstance(filters, dict):
+        raise ValueError("filters 应为 {列名: [取值, ...]}")
+    for column, values in (filters or {}).items():
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"不支持按 {column} 筛选，可选 {', '.join(FILTER_COLUMNS)}")
+        # 字符串也可迭代，不检查会被逐字匹配
+        if values is not None and not isinstance(values, (list, tuple)):
+            raise ValueError(f"filters 中 {column} 的取值应为列表，例如 [\"{values}\"]")
+    price_range = query.get('price_range')
+    if price_range is not None and not (
+            isinstance(price_range, (list, tuple)) and len(price_range) == 2 and all(map(_is_number, price_range))):
+        raise ValueError("price_range 应为 [最低价, 最高价]，均为数字")
+    for key in ('offset', 'limit'):
+        value = query.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            raise ValueError(f"{key} 应为非负整数")
+    return kind
+
+
+def _check_columns(frame, columns, sort):
+    missing = [c for c in list(columns or []) + ([sort] if sort else []) if c not in frame.columns]
+    if missing:
+        raise ValueError(f"不存在的列：{', '.join(missing)}")
+
+
+def run_query(query, dataset=None):
+    """
+    执行一个查询，返回按排序和 offset/limit 取好的 LazyView 以及要输出的列（None 表示全部列）。
+    只取出行号，结果数据由调用方按需分块读取（view.page / pagination 中的导出函数）。
+    """
+    kind = _check_query(query)
+    dataset = dataset or registry.current()
+    if kind == 'listings':
+        view = select_listings(dataset, query.get('filters'), query.get('price_range'), query.get('search'))
+        default_sort, default_ascending, default_abs = None, True, False
+    elif kind == 'price_changes':
+        changes = dataset_price_changes(dataset)
+        view = select_price_changes(changes, query.get('manufacturer'), query.get('model'),
+                                    query.get('stores'), query.get('sizes'))
+        default_sort, default_ascending, default_abs = '价格变化', False, True
+    else:
+        view = select_products(dataset, query.get('manufacturer'), query.get('model'), query.get('sizes'))
+        default_sort, default_ascending, default_abs = None, True, False
+
+    columns = query.get('columns')
+    sort = query.get('sort', default_sort)
+    _check_columns(view.df, columns, sort)
+
+    offset = query.get('offset') or 0
+    limit = query.get('limit')
+    stop = len(view) if limit is None else min(offset + limit, len(view))
+    if offset >= stop:
+        positions = np.empty(0, dtype=np.int64)
+    elif sort is None:
+        positions = np.arange(offset, stop)
+    else:
+        # 默认按绝对值排序只针对默认的排序列，其它列需要显式传 abs
+        use_abs = query.get('abs', default_abs and sort == default_sort)
+        if use_abs and not pd.api.types.is_numeric_dtype(view.df[sort]):
+            raise ValueError(f"abs 只能用于数值列，{sort} 不是数值列")
+        key = np.abs if use_abs else None
+        # 与分页相同：只对 stop 之前的行做部分排序
+        positions = page_positions(view, 0, stop, sort_key=sort,
+                                   ascending=query.get('ascending', default_ascending), key=key)[offset:]
+    return LazyView(view.df, view.row_ids[positions]), columns
+
+
+def query_frame(query, dataset=None):
+    """执行一个查询并取出结果 DataFrame，适合结果不大的情况"""
+    view, columns = run_query(query, dataset)
+    return view.to_frame(columns)
+
+
+def run_batch(queries, dataset=None):
+    """
+    批量执行多个查询，返回各自的 (LazyView, 列)。
+    所有查询使用同一个数据版本，即使期间后台刷新切换了版本，结果之间也保持一致。
+    """
+    if not isinstance(queries, list):
+        raise ValueError("queries 应为查询列表")
+    dataset = dataset or registry.current()
+    return [run_query(query, dataset) for query in queries]
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ('厂商', '尺寸', '机型', '店铺')
+PRICE_COLUMN = '清洗价格'
+
+
+class LazyView:
+    """
+    筛选结果的惰性视图，只保存命中的行号。
+    只有调用 page()/to_frame() 时才会从原表取出对应的行。
+    """
+
+    def __init__(self, df, row_ids):
+        self.df = df
+        self.row_ids = row_ids
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def column(self, name):
+        """只取出某一列命中行的值"""
+        return self.df[name].to_numpy()[self.row_ids]
+
+    def unique(self, name):
+        return sorted(pd.Series(self.column(name)).dropna().unique())
+
+    def page(self, offset, limit, columns=None):
+        rows = self.row_ids[offset:offset + limit]
+        frame = self.df.iloc[rows]
+        return frame if columns is None else frame[list(columns)]
+
+    def to_frame(self, columns=None):
+        return self.page(0, len(self.row_ids), columns)
+
+
+class FilterIndex:
+    """
+    厂商/尺寸/机型/店铺 以及价格区间的筛选索引。
+
+    每个维度列按取值做一次稳定排序，某个取值对应的行号就是排序结果中的一段连续区间；
+    价格列按值排序，价格区间查询通过二分查找得到。各条件的行号数组求交集，
+    整个过程不复制、不遮罩原表。
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS, price_column=PRICE_COLUMN):
+        self.df = df
+        self.size = len(df)
+        self._postings = {}
+        for column in columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # 分类列按类别顺序编号，多个分片合并后的类别顺序未必有序，先按取值排好
+                series = series.cat.reorder_categories(sorted(series.cat.categories))
+            codes, values = pd.factorize(series, sort=True)
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            # 取值编号 k 对应 order[bounds[k]:bounds[k + 1]]，缺失值（编号 -1）排在最前面被跳过
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            lookup = {value: k for k, value in enumerate(values)}
+            self._postings[column] = (order, bounds, lookup)
+
+        prices = df[price_column].to_numpy(dtype=float)
+        self._price_order = np.argsort(prices, kind='stable').astype(np.int32)
+        self._sorted_prices = prices[self._price_order]
+
+    def options(self, column):
+        return list(self._postings[column][2])
+
+    def rows_for(self, column, values):
+        """取某列任一取值命中的行号（升序）"""
+        order, bounds, lookup = self._postings[column]
+        parts = [order[bounds[k]:bounds[k + 1]] for k in (lookup.get(v) for v in values) if k is not None]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def rows_in_price_range(self, low, high):
+        """二分查找价格在 [low, high] 内的行号（升序），缺失价格不会命中"""
+        start = np.searchsorted(self._sorted_prices, low, side='left')
+        stop = np.searchsorted(self._sorted_prices, high, side='right')
+        return np.sort(self._price_order[start:stop])
+
+    def select(self, filters=None, price_range=None, row_ids=None):
+        """
+        组合筛选，返回 LazyView。
+        filters 形如 {'厂商': ['小米'], '尺寸': ['65寸']}，取值为空的条件会被忽略；
+        row_ids 可传入其它来源（如标题搜索）得到的有序行号，一并求交集。
+        """
+        candidates = [] if row_ids is None else [row_ids]
+        for column, values in (filters or {}).items():
+            if values:
+                candidates.append(self.rows_for(column, values))
+        if price_range is not None:
+            candidates.append(self.rows_in_price_range(*price_range))
+
+        if not candidates:
+            return LazyView(self.df, np.arange(self.size, dtype=np.int32))
+        # 从最小的集合开始求交集
+        candidates.sort(key=len)
+        result = candidates[0]
+        for rows in candidates[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return LazyView(self.df, result)
@@ -0,0 +1,172 @@
+"""
+本地 HTTP 查询服务，供其它服务批量拉取数据，不经过看板页面：
+
+    python -m utils.query_server --port 8765
+
+    GET  /health                      当前数据版本和行数
+    GET  /columns                     明细列名和类型，以及可筛选维度的取值
+    POST /query?format=arrow          请求体为一个查询（见 utils.query_api），
+                                      format 可选 arrow（默认，Arrow IPC 流）、parquet、csv、json
+    POST /batch                       请求体为 {"queries": [...]}，返回 JSON，每个查询一项
+
+arrow/parquet/csv 以分块传输编码边生成边发送，服务端同一时间只转换一块数据；
+json 和 /batch 单个查询最多返回 MAX_JSON_ROWS 行，更大的结果请用 arrow/parquet。
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils import refresh_worker
+from utils.dataset_registry import registry
+from utils.pagination import iter_csv_chunks, write_arrow_stream, write_parquet
+from utils.query_api import run_batch, run_query
+from utils.query_engine import FILTER_COLUMNS, FilterIndex
+
+MAX_JSON_ROWS = 10000
+
+CONTENT_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+
+class ChunkedWriter:
+    """把写入的数据按 HTTP 分块传输编码发送，供 pyarrow 作为输出流使用"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        if data:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), bytes(data)))
+            self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        if not self.closed:
+            self.wfile.write(b'0\r\n\r\n')
+            self.closed = True
+
+
+def _records(view, columns):
+    """JSON 输出：时间转为字符串，缺失值转为 null"""
+    frame = view.page(0, MAX_JSON_ROWS, columns)
+    return json.loads(frame.to_json(orient='records', date_format='iso', force_ascii=False))
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        # 每个请求只取一次数据集，后台刷新切换版本不影响正在处理的请求
+        dataset = registry.current()
+        if path == '/health':
+            self._send_json({'version': dataset.version, 'rows': len(dataset.df)})
+        elif path == '/columns':
+            filter_index = dataset.derived('filter_index', FilterIndex)
+            self._send_json({
+                'version': dataset.version,
+                'columns': {name: str(dtype) for name, dtype in dataset.df.dtypes.items()},
+                'options': {column: [str(v) for v in filter_index.options(column)] for column in FILTER_COLUMNS},
+            })
+        else:
+            self._send_json({'error': f"未知路径：{path}"}, status=404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except json.JSONDecodeError as e:
+            self._send_json({'error': f"请求体不是合法的 JSON：{e}"}, status=400)
+            return
+        dataset = registry.current()
+        try:
+            if not isinstance(body, dict):
+                raise ValueError("请求体应为 JSON 对象")
+            if url.path == '/query':
+                fmt = parse_qs(url.query).get('format', ['arrow'])[0]
+                if fmt not in CONTENT_TYPES:
+                    raise ValueError(f"不支持的格式：{fmt}，可选 {', '.join(CONTENT_TYPES)}")
+                view, columns = run_query(body, dataset)
+            elif url.path == '/batch':
+                results = run_batch(body.get('queries', []), dataset)
+            else:
+                self._send_json({'error': f"未知路径：{url.path}"}, status=404)
+                return
+        except (ValueError, TypeError) as e:
+            self._send_json({'error': str(e)}, status=400)
+            return
+
+        if url.path == '/batch':
+            self._send_json({
+                'version': dataset.version,
+                'results': [{'rows': len(view), 'data': _records(view, columns)} for view, columns in results],
+            })
+        elif fmt == 'json':
+            self._send_json({'version': dataset.version, 'rows': len(view), 'data': _records(view, columns)})
+        else:
+            self._send_stream(fmt, view, columns, dataset.version)
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', CONTENT_TYPES['json'])
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, fmt, view, columns, version):
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[fmt])
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('X-Data-Version', version)
+        self.send_header('X-Row-Count', str(len(view)))
+        self.end_headers()
+        sink = ChunkedWriter(self.wfile)
+        try:
+            if fmt == 'arrow':
+                write_arrow_stream(view, sink, columns)
+            elif fmt == 'parquet':
+                write_parquet(view, sink, columns)
+            else:
+                for chunk in iter_csv_chunks(view, columns):
+                    sink.write(chunk)
+        except Exception:
+            # 响应头已发出，无法再返回错误码；不发送结束块并断开连接，客户端会得到不完整的响应
+            self.close_connection = True
+            raise
+        sink.close()
+
+
+def serve(host='127.0.0.1', port=8765):
+    registry.current()
+    # 与看板相同，新快照由后台线程入库并切换版本
+    refresh_worker.start()
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f"查询服务：http://{host}:{port}（数据版本 {registry.current().version}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
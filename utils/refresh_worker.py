@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+import time
+
+from utils.dataset_registry import registry
+from utils.ingest import discover_snapshots
+from utils.products import dataset_price_changes
+from utils.query_engine import FilterIndex
+from utils.search_index import build_search_index
+
+# 检查 data/ 的间隔（秒），可用环境变量 DASHBOARD_REFRESH_INTERVAL 调整，设为 0 关闭后台刷新
+ENV_VAR = 'DASHBOARD_REFRESH_INTERVAL'
+DEFAULT_INTERVAL = 60
+
+# 新版本切换前预先构建的派生结果，名称与各页面 dataset.derived() 使用的一致。
+# 汇总表和告警在加载数据集时已读入 dataset.tables，不需要预构建。
+# 词云不在此列：生成新版本的词频会清理旧版本的词云图片，而旧会话可能仍在展示。
+WARM_DERIVED = {
+    'filter_index': lambda dataset: dataset.derived('filter_index', FilterIndex),
+    'search_index': lambda dataset: dataset.derived('search_index', build_search_index),
+    # 同时构建商品索引 products
+    'price_changes': dataset_price_changes,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_interval():
+    try:
+        return float(os.environ.get(ENV_VAR, DEFAULT_INTERVAL))
+    except ValueError:
+        return DEFAULT_INTERVAL
+
+
+def snapshot_signature():
+    """data/ 下快照文件的 (文件名, 修改时间, 大小)，只做 stat，用于判断是否有新文件"""
+    return tuple(
+        (path.name, stat.st_mtime_ns, stat.st_size)
+        for path in discover_snapshots()
+        for stat in [path.stat()]
+    )
+
+
+def warm_dataset(dataset):
+    """在新数据集对外可见之前构建常用的派生结果，首个用到它的会话不必等待"""
+    for name, warm in WARM_DERIVED.items():
+        try:
+            warm(dataset)
+        except Exception:
+            # 预构建失败不影响切换，页面用到时会再按需构建
+            logger.exception("预构建 %s 失败", name)
+
+
+class RefreshWorker(threading.Thread):
+    """
+    后台刷新线程：定期检查 data/ 下的快照，有新文件或文件变化时在本线程内入库、
+    加载新版本并预构建派生结果，完成后才由注册表切换当前数据集。
+    会话在一次重跑开始时取得数据集对象并一直使用它，切换不影响正在渲染的会话，
+    之后的重跑直接拿到新版本，不需要等待入库和加载。
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='dataset-refresh', daemon=True)
+        self.interval = interval
+        self.last_check = None
+        self.last_refresh = None
+        self.last_error = None
+        self.refreshing = False
+        self._wakeup = threading.Event()
+        self._signature = None
+
+    def request(self):
+        """立即检查一次（例如用户点击“刷新数据”），不等下一个检查周期"""
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            self.check()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def check(self):
+        try:
+            signature = snapshot_signature()
+            if signature != self._signature:
+                self.refreshing = True
+                started = time.perf_counter()
+                version = registry.current().version
+                dataset = registry.refresh(prepare=warm_dataset)
+                if dataset.version != version:
+                    self.last_refresh = {
+                        'version': dataset.version,
+                        'seconds': round(time.perf_counter() - started, 2),
+                        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    }
+                self._signature = signature
+            self.last_error = None
+        except Exception as e:
+            # 入库失败（例如文件仍在写入）时下个周期重试
+            logger.exception("后台刷新失败")
+            self.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            self.refreshing = False
+        self.last_check = time.time()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start():
+    """启动进程内唯一的后台刷新线程，重复调用直接返回已启动的线程；间隔为 0 时返回 None"""
+    global _worker
+    with _worker_lock:
+        interval = refresh_interval()
+        if _worker is None and interval > 0:
+            _worker = RefreshWorker(interval)
+            _worker.start()
+        return _worker
+
+
+def worker():
+    return _worker
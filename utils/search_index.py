@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# 多个字段拼接时使用的分隔符，保证 n-gram 不会跨字段
+FIELD_SEPARATOR = '\x00'
+
+# 单字编码为其码位，双字编码为 (前一字码位 + 1) << 21 | 后一字码位，两者不会重合
+CODE_BITS = 21
+
+# 每次编码和排序的文本数，限制建索引时临时数组的大小；每段文本各有一份倒排表。
+# 段内文本编号占低 16 位，与 n-gram 编码拼成一个 int64 后只需一次排序
+OWNER_BITS = 16
+SEGMENT_TEXTS = 1 << OWNER_BITS
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def _bigram_keys(codes):
+    return ((codes[:-1] + 1) << CODE_BITS) | codes[1:]
+
+
+def _term_keys(term):
+    """查询词需要命中的 n-gram：单字词取该字，否则取全部相邻双字"""
+    codes = _code_points(term)
+    return codes if len(codes) < 2 else np.unique(_bigram_keys(codes))
+
+
+def _gram_postings(texts, first_id=0):
+    """
+    一段文本的单字和相邻双字，返回 (有序的 n-gram 编码, 各编码在 text_ids 中的起止位置, text_ids)，
+    文本编号从 first_id 开始。文本拼接成一个码位数组后整体编码和排序，不逐字构建集合。
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    codes = _code_points(''.join(texts))
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    # 双字不能跨越两个文本的边界
+    inside = owners[:-1] == owners[1:]
+    pairs = np.concatenate([
+        (codes << OWNER_BITS) | owners,
+        (_bigram_keys(codes)[inside] << OWNER_BITS) | owners[:-1][inside],
+    ])
+    # 排序去重后按 n-gram 分组，组内文本编号升序
+    pairs = np.unique(pairs)
+    keys = pairs >> OWNER_BITS
+    starts = np.flatnonzero(np.diff(keys, prepend=-1))
+    gram_keys = keys[starts]
+    owners = (pairs & (SEGMENT_TEXTS - 1)).astype(np.int32) + first_id
+    return gram_keys, np.append(starts, len(keys)), owners
+
+
+class SearchIndex:
+    """
+    标题等文本字段的 n-gram 倒排索引。
+    相同的文本只索引一次（同一链接每次爬取的标题基本不变），每个单字/双字对应一段有序的文本编号，
+    查询时先求倒排表交集，再用 Arrow 的字符串函数对候选文本做子串校验，最后映射回行号。
+    """
+
+    def __init__(self, texts):
+        row_text, uniques = pd.factorize(np.asarray(texts, dtype=object))
+        # 大小写不同的文本转小写后可能相同，再合并一次
+        lowered, uniques = pd.factorize(pd.Series(uniques, dtype=object).str.lower())
+        self._row_text = lowered[row_text].astype(np.int32)
+        self.texts = pa.array(uniques, type=pa.large_string())
+        uniques = list(uniques)
+        self._segments = [_gram_postings(uniques[start:start + SEGMENT_TEXTS], start)
+                          for start in range(0, len(uniques), SEGMENT_TEXTS)]
+        self.size = len(self._row_text)
+
+    @staticmethod
+    def _segment_candidates(segment, keys):
+        """某段文本中包含 keys 全部 n-gram 的文本编号（升序）"""
+        gram_keys, bounds, postings = segment
+        pos = np.searchsorted(gram_keys, keys)
+        if (pos >= len(gram_keys)).any() or (gram_keys[pos] != keys).any():
+            return np.empty(0, dtype=np.int32)
+        lists = [postings[bounds[p]:bounds[p + 1]] for p in pos]
+        # 从最短的倒排表开始求交集
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates
+
+    def _match_term(self, term):
+        """包含 term 的文本编号（升序）"""
+        keys = _term_keys(term)
+        if not len(keys) or not self._segments:
+            return np.empty(0, dtype=np.int32)
+        candidates = np.concatenate([self._segment_candidates(segment, keys) for segment in self._segments])
+        if len(term) <= 2:
+            return candidates
+        # 双字都命中不代表整个词连续出现，需对候选文本做一次子串校验
+        matched = pc.match_substring(self.texts.take(candidates), term).to_numpy(zero_copy_only=False)
+        return candidates[matched]
+
+    def search(self, query):
+        """
+        返回同时包含所有查询词（按空白切分，忽略大小写）的行号，按行号升序。
+        查询为空时返回 None，表示不过滤。
+        """
+        terms = query.lower().split()
+        if not terms:
+            return None
+        result = None
+        for term in sorted(terms, key=len, reverse=True):
+            texts = self._match_term(term)
+            result = texts if result is None else np.intersect1d(result, texts, assume_unique=True)
+            if not len(result):
+                return np.empty(0, dtype=np.int32)
+        matched = np.zeros(len(self.texts), dtype=bool)
+        matched[result] = True
+        return np.flatnonzero(matched[self._row_text]).astype(np.int32)
+
+
+def build_search_index(df, columns=('标题',)):
+    """对指定文本列（默认仅标题）建立倒排索引，多列时任一列命中即可"""
+    columns = list(columns)
+    texts = df[columns[0]].fillna('').astype(str)
+    for column in columns[1:]:
+        texts = texts + FIELD_SEPARATOR + df[column].fillna('').astype(str)
+    return SearchIndex(texts)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# 页面上可选的时间粒度
+GRANULARITIES = ['小时', '天', '周']
+
+# 每条曲线最多发送到浏览器的点数
+MAX_POINTS_PER_SERIES = 200
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标。
+    首尾两点总是保留，中间每个桶保留与相邻桶构成最大三角形面积的点，
+    在点数受限的情况下尽量保留峰谷形状。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    every = (n - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        # 下一个桶的平均点作为三角形的第三个顶点（最后一个桶的下一个即末点）
+        next_stop = min(int((i + 2) * every) + 1, n)
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def bucket_start(times, granularity):
+    """时间所在桶的起点：整点、当天零点或当周周一零点"""
+    if granularity == '小时':
+        return times.dt.floor('h')
+    if granularity == '天':
+        return times.dt.floor('D')
+    return times.dt.to_period('W-SUN').dt.start_time
+
+
+def resample(df, value_column, granularity, series_column='机型', time_column='爬取时间'):
+    """
+    按时间粒度对每条曲线分桶，返回每桶的均值、最低、最高和最新值：
+    列为 [time_column, series_column, 均值, 最低, 最高, 最新]。
+    """
+    frame = df[[time_column, series_column, value_column]].dropna(subset=[time_column, value_column])
+    frame = frame.sort_values(time_column, kind='stable')
+    buckets = frame.groupby(
+        [frame[series_column], bucket_start(frame[time_column], granularity)], observed=True
+    )[value_column]
+    result = buckets.agg(均值='mean', 最低='min', 最高='max', 最新='last').reset_index()
+    return result[[time_column, series_column, '均值', '最低', '最高', '最新']]
+
+
+def downsample(resampled, max_points=MAX_POINTS_PER_SERIES, series_column='机型',
+               time_column='爬取时间', value_column='均值'):
+    """对每条曲线分别做 LTTB 降采样，保证每条曲线不超过 max_points 个点"""
+    parts = []
+    for _, series in resampled.groupby(series_column, observed=True, sort=False):
+        if len(series) > max_points:
+            x = series[time_column].to_numpy().astype('datetime64[ns]').astype(np.int64).astype(float)
+            y = series[value_column].to_numpy(dtype=float)
+            series = series.iloc[lttb_indices(x, y, max_points)]
+        parts.append(series)
+    if not parts:
+        return resampled.iloc[0:0]
+    return pd.concat(parts, ignore_index=True)
+
+
+def trend_series(df, value_column, granularity='天', max_points=MAX_POINTS_PER_SERIES,
+                 start=None, end=None):
+    """按粒度重采样并降采样后的趋势数据，图表负载与历史长度无关"""
+    if start is not None or end is not None:
+        times = df['爬取时间']
+        mask = times.notna()
+        if start is not None:
+            mask &= times >= pd.Timestamp(start)
+        if end is not None:
+            mask &= times < pd.Timestamp(end) + pd.Timedelta(days=1)
+        df = df[mask]
+    return downsample(resample(df, value_column, granularity), max_points)
@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import pickle
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# 核心卖点中的字段前缀，例如“屏幕：”“显示:”
+REMOVE_WORDS = ['屏幕', '智能', '能效', '显示', '分辨率', '尺寸', '功能', '特点', '参数']
+STOP_WORDS = {'的', '了', '和', '与', '及', '或', '等', '中', '为', '以'}
+
+# 行数少于该值时直接在当前进程分词，进程池的启动开销不划算
+PARALLEL_THRESHOLD = 20000
+CHUNK_SIZE = 5000
+
+# jieba 前缀词典的磁盘缓存，与 utils.data_store.STORE_DIR 下的其它缓存放在一起。
+# 这里不导入 data_store，分词子进程只需要 numpy 和 jieba，不必加载 pandas/pyarrow。
+# jieba 自带的 marshal 缓存反序列化几十万个词条时比重新构建还慢，这里改用 pickle 保存。
+JIEBA_CACHE = Path("data") / "store" / "cache" / "jieba.pkl"
+
+# 子进程内的分词配置，由 _init_worker 在每个进程启动时设置一次
+_worker_config = {}
+
+
+def load_jieba():
+    """
+    导入 jieba 并初始化默认词典的前缀词典。首次运行时由默认词典构建并写入 JIEBA_CACHE，
+    之后（包括新启动的进程和分词子进程）都直接从该缓存加载。
+    """
+    import jieba
+
+    tokenizer = jieba.dt
+    with tokenizer.lock:
+        if tokenizer.initialized:
+            return jieba
+        try:
+            with open(JIEBA_CACHE, 'rb') as f:
+                version, freq, total = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            version = None
+        if version != jieba.__version__:
+            # 缓存不存在、已损坏或由其它版本的 jieba 生成时重新构建
+            freq, total = tokenizer.gen_pfdict(tokenizer.get_dict_file())
+            JIEBA_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = JIEBA_CACHE.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((jieba.__version__, freq, total), f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(JIEBA_CACHE)
+        tokenizer.FREQ, tokenizer.total = freq, total
+        tokenizer.initialized = True
+    return jieba
+
+
+class TokenMatrix:
+    """
+    文本 × 词 的稀疏计数矩阵（CSR 格式）。
+    第 i 行的词编号为 indices[indptr[i]:indptr[i + 1]]，对应次数在 counts 的同一区间。
+    """
+
+    def __init__(self, vocabulary, indptr, indices, counts):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+
+    @property
+    def shape(self):
+        return len(self.indptr) - 1, len(self.vocabulary)
+
+    def frequencies(self, rows=None):
+        """汇总指定行（默认全部行）的词频，返回 {词: 次数}"""
+        indices, counts = self.indices, self.counts
+        if rows is not None:
+            row_of_entry = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+            mask = np.isin(row_of_entry, rows)
+            indices, counts = indices[mask], counts[mask]
+        totals = np.bincount(indices, weights=counts, minlength=len(self.vocabulary))
+        nonzero = np.flatnonzero(totals)
+        return {self.vocabulary[i]: int(totals[i]) for i in nonzero}
+
+
+def preprocess_text(text, remove_words=REMOVE_WORDS):
+    for word in remove_words:
+        text = text.replace(f"{word}：", "")
+        text = text.replace(f"{word}:", "")  # 处理英文冒号的情况
+    return text
+
+
+def _init_worker(user_dict, stop_words, remove_words):
+    # 每个进程只加载一次词典缓存和自定义词典
+    jieba = load_jieba()
+    if user_dict:
+        jieba.load_userdict(str(user_dict))
+    _worker_config['stop_words'] = set(stop_words)
+    _worker_config['remove_words'] = list(remove_words)
+
+
+def _tokenize_chunk(texts):
+    jieba = load_jieba()
+    stop_words = _worker_config['stop_words']
+    remove_words = _worker_config['remove_words']
+    rows = []
+    for text in texts:
+        if not isinstance(text, str):
+            rows.append({})
+            continue
+        words = jieba.cut(preprocess_text(text, remove_words))
+        rows.append(Counter(
+            word for word in words
+            if word not in stop_words and len(word.strip()) > 1
+        ))
+    return rows
+
+
+def _build_matrix(row_counters):
+    vocabulary = {}
+    indptr = np.zeros(len(row_counters) + 1, dtype=np.int64)
+    indices = []
+    counts = []
+    for i, counter in enumerate(row_counters):
+        for word, count in counter.items():
+            indices.append(vocabulary.setdefault(word, len(vocabulary)))
+            counts.append(count)
+        indptr[i + 1] = len(indices)
+    return TokenMatrix(
+        list(vocabulary),
+        indptr,
+        np.asarray(indices, dtype=np.int32),
+        np.asarray(counts, dtype=np.int32),
+    )
+
+
+def tokenize_texts(texts, workers=None, user_dict=None, stop_words=STOP_WORDS,
+                   remove_words=REMOVE_WORDS, chunk_size=CHUNK_SIZE):
+    """
+    逐行分词并返回 TokenMatrix。
+    行数较多时按块分发到进程池，每个子进程启动时加载一次自定义词典。
+    """
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    initargs = (user_dict, stop_words, remove_words)
+
+    if workers == 1 or len(texts) < PARALLEL_THRESHOLD:
+        _init_worker(*initargs)
+        return _build_matrix(_tokenize_chunk(texts))
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    # 使用 spawn 启动子进程，避免在 Streamlit 的多线程服务进程中 fork
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as pool:
+        row_counters = [row for rows in pool.map(_tokenize_chunk, chunks) for row in rows]
+    return _build_matrix(row_counters)
+
+
+if __name__ == "__main__":
+    # 预先生成 jieba 词典缓存：python -m utils.tokenizer
+    import time
+
+    start = time.perf_counter()
+    load_jieba()
+    print(f"jieba 词典缓存：{JIEBA_CACHE}（{time.perf_counter() - start:.2f} 秒）")
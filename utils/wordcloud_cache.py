@@ -0,0 +1,110 @@
+import json
+import shutil
+from collections import Counter
+
+from utils.data_store import STORE_DIR
+from utils.tokenizer import tokenize_texts
+
+WORDCLOUD_DIR = STORE_DIR / "wordcloud"
+
+# 莫兰迪色系
+MORANDI_COLORS = [
+    (199, 178, 153),  # 浅棕色
+    (183, 164, 142),  # 灰棕色
+    (168, 153, 134),  # 灰褐色
+    (153, 138, 122),  # 深灰褐色
+    (138, 123, 110)   # 深褐色
+]
+
+
+def build_word_frequencies(df):
+    """按厂商、爬取日期分别统计核心卖点词频：{厂商: {日期: {词: 次数}}}"""
+    texts = df[['厂商', '爬取时间', '核心卖点']].dropna(subset=['核心卖点']).reset_index(drop=True)
+    # 全部文本只分词一次，各分组从稀疏矩阵中按行汇总
+    matrix = tokenize_texts(texts['核心卖点'])
+    crawl_dates = texts['爬取时间'].dt.strftime('%Y-%m-%d').fillna('未知日期')
+    frequencies = {}
+    for (manufacturer, crawl_date), rows in texts.groupby([texts['厂商'], crawl_dates], observed=True).indices.items():
+        frequencies.setdefault(str(manufacturer), {})[crawl_date] = matrix.frequencies(rows)
+    return frequencies
+
+
+def _version_dir(data_version):
+    return WORDCLOUD_DIR / str(data_version)
+
+
+def load_word_frequencies(df, data_version):
+    """读取该数据版本的词频，不存在时计算并写入磁盘，同时清理旧版本的缓存"""
+    path = _version_dir(data_version) / "frequencies.json"
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    frequencies = build_word_frequencies(df)
+    if WORDCLOUD_DIR.exists():
+        shutil.rmtree(WORDCLOUD_DIR)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(frequencies, ensure_ascii=False), encoding='utf-8')
+    return frequencies
+
+
+def merge_frequencies(frequencies_by_date):
+    total = Counter()
+    for frequencies in frequencies_by_date.values():
+        total.update(frequencies)
+    return total
+
+
+def morandi_color_func(word, font_size, position, orientation, random_state=None, **kwargs):
+    color = random_state.choice(MORANDI_COLORS)
+    return f"rgb{color}"
+
+
+def render_wordcloud(frequencies, path):
+    """直接由词频生成词云 PNG，不经过 matplotlib"""
+    # wordcloud 及其依赖导入较慢，只在确实需要渲染时导入
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        width=400,
+        height=200,
+        background_color='white',
+        font_path='simhei.ttf',
+        max_words=100,
+        color_func=morandi_color_func,  # 使用莫兰迪色系颜色函数
+        min_font_size=12,
+        max_font_size=160,
+        prefer_horizontal=0.7,  # 允许更多垂直文字
+        random_state=42  # 设置随机种子以确保可重复性
+    ).generate_from_frequencies(frequencies)
+    wordcloud.to_image().save(path, format='png')
+
+
+def wordcloud_images(df, data_version, manufacturers):
+    """
+    返回 {厂商: PNG 字节}，词频为空的厂商返回 None。
+    图片按数据版本缓存在磁盘上，数据不变时不会重新分词或渲染。
+    """
+    frequencies = None
+    images = {}
+    for manufacturer in manufacturers:
+        path = _version_dir(data_version) / f"{manufacturer}.png"
+        if not path.exists():
+            if frequencies is None:
+                frequencies = load_word_frequencies(df, data_version)
+            words = merge_frequencies(frequencies.get(manufacturer, {}))
+            if not words:
+                images[manufacturer] = None
+                continue
+            render_wordcloud(words, path)
+        images[manufacturer] = path.read_bytes()
+    return images
+
+
+if __name__ == "__main__":
+    # 预生成词云：python -m utils.wordcloud_cache
+    from utils.ingest import ingest_snapshots, load_history
+
+    version = ingest_snapshots()
+    images = wordcloud_images(load_history(), version, ['小米', '创维', '海信', 'TCL'])
+    for manufacturer, image in images.items():
+        print(f"{manufacturer}: {'已生成' if image else '无词频'}")